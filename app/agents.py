@@ -4,28 +4,160 @@ Research Analysis Agents: Higher-order analysis using the RAG pipeline.
 Provides specialized agents for research synthesis, trend analysis,
 and gap identification across indexed research papers.
 """
-from typing import Dict, List
+import asyncio
+import functools
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import orjson
+
+
+@functools.lru_cache(maxsize=256)
+def _format_context(chunks: Tuple[Tuple[str, str, float], ...]) -> str:
+    """Join ``(source, text, distance)`` triples into the agent context block.
+
+    Memoized so repeated retrievals of the same chunks (e.g. the same topic
+    analyzed by several agents) reuse the already-built string.
+    """
+    return "\n\n".join(
+        f"[From {source}]\n{text}" for source, text, _ in chunks
+    )
+
+
+# Fixed scaffolding of the single-agent prompts.  Each prompt is
+# INSTRUCTIONS + topic + excerpts header + context + END, assembled with one
+# str.join.  The instructions do not depend on the topic and come first, so
+# every call of an agent shares the longest possible prompt prefix and
+# backends that reuse a cached prefix (Ollama keeps the previous prompt's KV
+# cache per loaded model; llama.cpp's cache_prompt, provider prompt caching)
+# only process the topic and excerpts anew.
+_TOPIC_HEADER = "\n\nTopic: "
+_EXCERPTS_HEADER = "\n\nResearch excerpts:\n"
+
+_SYNTH_INSTRUCTIONS = (
+    "You are a research synthesis expert. Given excerpts from "
+    "multiple research papers about the topic below, provide a "
+    "comprehensive synthesis that: "
+    "1) Identifies common findings, "
+    "2) Notes contradictions or disagreements, "
+    "3) Highlights the strongest evidence, "
+    "4) Draws overarching conclusions."
+    + _TOPIC_HEADER
+)
+_SYNTH_END = "\n\nSynthesis:"
+
+_TRENDS_INSTRUCTIONS = (
+    "You are a research trend analyst. Given excerpts from "
+    "research papers about the topic below, identify: "
+    "1) Emerging trends and directions, "
+    "2) Evolution of methodologies over time, "
+    "3) Shifts in research focus, "
+    "4) Predicted future directions based on current trajectory."
+    + _TOPIC_HEADER
+)
+_TRENDS_END = "\n\nTrend Analysis:"
+
+_GAPS_INSTRUCTIONS = (
+    "You are a research gap analyst. Given excerpts from "
+    "research papers about the topic below, identify: "
+    "1) Under-explored areas mentioned but not studied, "
+    "2) Methodological limitations acknowledged by authors, "
+    "3) Contradictions that need resolution, "
+    "4) Missing perspectives or populations, "
+    "5) Suggested future work by authors."
+    + _TOPIC_HEADER
+)
+_GAPS_END = "\n\nGap Analysis:"
+
+# Task blocks for the batched prompt, keyed by agent type.  Each mirrors the
+# numbered instructions of the matching single-agent prompt.
+_BATCH_TASKS: Dict[str, Tuple[str, str]] = {
+    "synthesize": (
+        "SYNTHESIS",
+        "As a research synthesis expert, provide a comprehensive synthesis "
+        "that: 1) Identifies common findings, 2) Notes contradictions or "
+        "disagreements, 3) Highlights the strongest evidence, 4) Draws "
+        "overarching conclusions.",
+    ),
+    "trends": (
+        "TRENDS",
+        "As a research trend analyst, identify: 1) Emerging trends and "
+        "directions, 2) Evolution of methodologies over time, 3) Shifts in "
+        "research focus, 4) Predicted future directions based on current "
+        "trajectory.",
+    ),
+    "gaps": (
+        "GAPS",
+        "As a research gap analyst, identify: 1) Under-explored areas "
+        "mentioned but not studied, 2) Methodological limitations "
+        "acknowledged by authors, 3) Contradictions that need resolution, "
+        "4) Missing perspectives or populations, 5) Suggested future work "
+        "by authors.",
+    ),
+}
+
+
+def _parse_batched_response(response: str, agent_types: List[str]) -> Optional[Dict[str, str]]:
+    """Extract the per-agent answers from a batched JSON response.
+
+    Tolerates surrounding prose or code fences around the JSON object.
+    Returns ``None`` if the object is missing, malformed, or lacks a
+    string answer for any of *agent_types*.
+    """
+    start, end = response.find("{"), response.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        data = orjson.loads(response[start:end + 1])
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    if not all(isinstance(data.get(t), str) and data[t].strip() for t in agent_types):
+        return None
+    return {t: data[t].strip() for t in agent_types}
 
 
 class ResearchAgents:
     """Research analysis agents that use the RAG pipeline for higher-order analysis."""
 
     AGENT_TYPES = ("synthesize", "trends", "gaps")
+    CACHE_SIZE = 256
+    SEMANTIC_THRESHOLD = 0.95
 
     def __init__(self, rag_pipeline):
         """Initialize with a RAG pipeline instance.
 
         Args:
-            rag_pipeline: An object exposing search_similar(query, n) and
-                          query_glm4(prompt) methods.
+            rag_pipeline: An object exposing asearch_similar(query, n),
+                          aquery_glm4(prompt, limiter) and aclose() coroutine
+                          methods, plus embed(text) returning a normalized
+                          vector.
         """
         self.rag_pipeline = rag_pipeline
+        # (agent_type, topic, n_results) -> (topic_embedding, response),
+        # kept in LRU order.  Serves exact hits by key and near-duplicate
+        # topics by cosine similarity over the stored embeddings.
+        self._cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        # clear_cache is called from indexing threads while the event loop
+        # reads the cache.  The generation lets an analysis that started
+        # before a clear skip storing its now-stale result.
+        self._cache_lock = threading.Lock()
+        self._cache_generation = 0
+
+    def clear_cache(self):
+        """Drop all cached analyses (call after the index changes)."""
+        with self._cache_lock:
+            self._cache.clear()
+            self._cache_generation += 1
 
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
 
-    def _search_and_build_context(
+    async def _search_and_build_context(
         self, topic: str, n_results: int
     ) -> tuple:
         """Search for relevant chunks and build a formatted context string.
@@ -34,27 +166,75 @@ class ResearchAgents:
             A tuple of (context_str, sources_list).  If no chunks are found,
             context_str will be empty and sources_list will be an empty list.
         """
-        chunks: List[Dict] = self.rag_pipeline.search_similar(topic, n_results)
+        chunks: List[Dict] = await self.rag_pipeline.asearch_similar(topic, n_results)
 
         if not chunks:
             return "", []
 
-        context = "\n\n".join(
-            f"[From {chunk['source']}]\n{chunk['text']}"
-            for chunk in chunks
+        key = tuple(
+            (chunk["source"], chunk["text"], chunk["distance"]) for chunk in chunks
         )
+        context = _format_context(key)
 
         sources = [
-            {
-                "source": chunk["source"],
-                "text": chunk["text"],
-                "distance": chunk["distance"],
-            }
-            for chunk in chunks
+            {"source": source, "text": text, "distance": distance}
+            for source, text, distance in key
         ]
 
         return context, sources
 
+    def _cache_lookup(
+        self, agent_type: str, topic: str, n_results: int, embedding=None
+    ) -> Optional[Dict]:
+        """Return a cached response for this agent call, if any.
+
+        Without *embedding* only exact matches are considered.  With it,
+        the closest cached topic for the same agent and ``n_results`` is
+        returned when its cosine similarity reaches ``SEMANTIC_THRESHOLD``.
+        """
+        key = (agent_type, topic, n_results)
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None and embedding is not None:
+                best_score = self.SEMANTIC_THRESHOLD
+                for cached_key, cached_entry in self._cache.items():
+                    if cached_key[0] != agent_type or cached_key[2] != n_results:
+                        continue
+                    score = float(np.dot(cached_entry[0], embedding))
+                    if score >= best_score:
+                        best_score = score
+                        key, entry = cached_key, cached_entry
+            if entry is None:
+                return None
+
+            self._cache.move_to_end(key)
+        return {**entry[1], "question": topic}
+
+    def _cache_store(
+        self,
+        agent_type: str,
+        topic: str,
+        n_results: int,
+        embedding,
+        response: Dict,
+        generation: int,
+    ):
+        """Insert *response* into the LRU cache, evicting the oldest entry.
+
+        Nothing is stored if the cache was cleared since *generation* was
+        read, since the response may then describe the old index.
+        """
+        if response["analysis"].startswith("Error calling GLM-4"):
+            return
+        key = (agent_type, topic, n_results)
+        with self._cache_lock:
+            if generation != self._cache_generation:
+                return
+            self._cache[key] = (embedding, response)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+
     def _no_results_response(self, topic: str, agent_type: str) -> Dict:
         """Return a structured response when no relevant chunks are found."""
         return {
@@ -68,115 +248,214 @@ class ResearchAgents:
             "agent_type": agent_type,
         }
 
+    def _finalize(
+        self, topic: str, analysis: str, sources: List[Dict], agent_type: str
+    ) -> Dict:
+        """Assemble the structured response for one agent."""
+        return {
+            "question": topic,
+            "analysis": analysis,
+            "sources": sources,
+            "agent_type": agent_type,
+        }
+
+    # ------------------------------------------------------------------
+    # Prompt builders
+    # ------------------------------------------------------------------
+
+    def _build_synthesize_prompt(self, topic: str, context: str) -> str:
+        """Build the synthesis prompt for *topic* over *context*."""
+        return "".join((
+            _SYNTH_INSTRUCTIONS, topic, _EXCERPTS_HEADER, context, _SYNTH_END
+        ))
+
+    def _build_trends_prompt(self, topic: str, context: str) -> str:
+        """Build the trend analysis prompt for *topic* over *context*."""
+        return "".join((
+            _TRENDS_INSTRUCTIONS, topic, _EXCERPTS_HEADER, context, _TRENDS_END
+        ))
+
+    def _build_gaps_prompt(self, topic: str, context: str) -> str:
+        """Build the gap analysis prompt for *topic* over *context*."""
+        return "".join((
+            _GAPS_INSTRUCTIONS, topic, _EXCERPTS_HEADER, context, _GAPS_END
+        ))
+
+    def _build_batched_prompt(
+        self, topic: str, context: str, agent_types: List[str]
+    ) -> str:
+        """Build one prompt answering every agent in *agent_types* at once.
+
+        The fixed preamble and one labeled task block per agent come first,
+        then the topic and the excerpts (sent a single time), and finally a
+        request for a JSON object keyed by agent type.
+        """
+        tasks = "\n".join(
+            f"=== TASK {i}: {_BATCH_TASKS[t][0]} ===\n{_BATCH_TASKS[t][1]}"
+            for i, t in enumerate(agent_types, 1)
+        )
+        keys = ", ".join(f'"{t}"' for t in agent_types)
+        return "".join((
+            "You are a research analysis expert. Given excerpts from "
+            "research papers about the topic below, complete each task.\n\n",
+            tasks,
+            _TOPIC_HEADER,
+            topic,
+            _EXCERPTS_HEADER,
+            context,
+            "\n\nRespond with only a JSON object with the keys ",
+            keys,
+            ", each mapping to the full text answer for that task.",
+        ))
+
     # ------------------------------------------------------------------
     # Agent methods
     # ------------------------------------------------------------------
 
-    def synthesize(self, topic: str, n_results: int = 10) -> Dict:
+    async def _aquery_batched(
+        self,
+        topic: str,
+        context: str,
+        agent_types: List[str],
+        builders: Dict,
+        limiter=None,
+    ) -> List[str]:
+        """Answer all *agent_types* with one LLM call over *context*.
+
+        Falls back to one concurrent call per agent when the model's reply
+        cannot be parsed into a complete set of answers.
+        """
+        response = await self.rag_pipeline.aquery_glm4(
+            self._build_batched_prompt(topic, context, agent_types), limiter
+        )
+        parsed = _parse_batched_response(response, agent_types)
+        if parsed is not None:
+            return [parsed[t] for t in agent_types]
+        return await asyncio.gather(*(
+            self.rag_pipeline.aquery_glm4(builders[t](topic, context), limiter)
+            for t in agent_types
+        ))
+
+    async def arun_multi(
+        self,
+        topic: str,
+        agent_types,
+        n_results: int = 10,
+        batched: bool = False,
+        limiter=None,
+    ) -> List[Dict]:
+        """Run several agents on *topic* over a single shared retrieval.
+
+        The vector search and context formatting happen once; each agent
+        only contributes its own prompt, and the LLM calls run concurrently.
+        Agents whose result is already cached (exactly, or for a topic
+        embedding within ``SEMANTIC_THRESHOLD``) skip both steps.
+
+        Args:
+            topic:       The research topic / question to analyze.
+            agent_types: Iterable of agent names from ``AGENT_TYPES``.
+            n_results:   Number of chunks to retrieve from the vector store.
+            batched:     Send the context once in a single multi-task prompt
+                         instead of one prompt per agent.
+            limiter:     Optional asyncio.Semaphore bounding concurrent LLM
+                         requests (see ``aquery_glm4``).
+
+        Returns:
+            A list of response dicts in the same order as *agent_types*.
+
+        Raises:
+            ValueError: If any agent type is not recognized.
+        """
+        builders = {
+            "synthesize": self._build_synthesize_prompt,
+            "trends": self._build_trends_prompt,
+            "gaps": self._build_gaps_prompt,
+        }
+
+        agent_types = list(agent_types)
+        for agent_type in agent_types:
+            if agent_type not in builders:
+                raise ValueError(
+                    f"Unknown agent_type '{agent_type}'. "
+                    f"Must be one of: {', '.join(self.AGENT_TYPES)}"
+                )
+
+        # Read before searching, so results computed against an index that
+        # changes mid-request are not cached
+        generation = self._cache_generation
+        results: Dict[str, Dict] = {}
+        for agent_type in agent_types:
+            cached = self._cache_lookup(agent_type, topic, n_results)
+            if cached is not None:
+                results[agent_type] = cached
+
+        pending = [t for t in dict.fromkeys(agent_types) if t not in results]
+        if pending:
+            embedding = await asyncio.to_thread(self.rag_pipeline.embed, topic)
+            for agent_type in pending:
+                cached = self._cache_lookup(agent_type, topic, n_results, embedding)
+                if cached is not None:
+                    results[agent_type] = cached
+            pending = [t for t in pending if t not in results]
+
+        if pending:
+            context, sources = await self._search_and_build_context(topic, n_results)
+
+            if not context:
+                for agent_type in pending:
+                    results[agent_type] = self._no_results_response(topic, agent_type)
+            else:
+                if batched and len(pending) > 1:
+                    analyses = await self._aquery_batched(
+                        topic, context, pending, builders, limiter
+                    )
+                else:
+                    analyses = await asyncio.gather(*(
+                        self.rag_pipeline.aquery_glm4(
+                            builders[t](topic, context), limiter
+                        )
+                        for t in pending
+                    ))
+                for agent_type, analysis in zip(pending, analyses):
+                    response = self._finalize(topic, analysis, sources, agent_type)
+                    self._cache_store(
+                        agent_type, topic, n_results, embedding, response, generation
+                    )
+                    results[agent_type] = response
+
+        return [results[t] for t in agent_types]
+
+    async def asynthesize(self, topic: str, n_results: int = 10) -> Dict:
         """Synthesis agent -- synthesize findings across multiple papers.
 
         Searches for chunks related to *topic*, then asks GLM-4 to produce
         a comprehensive synthesis identifying common findings, contradictions,
         strongest evidence, and overarching conclusions.
         """
-        context, sources = self._search_and_build_context(topic, n_results)
-
-        if not context:
-            return self._no_results_response(topic, "synthesize")
-
-        prompt = (
-            "You are a research synthesis expert. Given excerpts from "
-            f"multiple research papers about {topic}, provide a "
-            "comprehensive synthesis that: "
-            "1) Identifies common findings, "
-            "2) Notes contradictions or disagreements, "
-            "3) Highlights the strongest evidence, "
-            "4) Draws overarching conclusions."
-            "\n\nResearch excerpts:\n"
-            f"{context}"
-            "\n\nSynthesis:"
-        )
-
-        analysis = self.rag_pipeline.query_glm4(prompt)
-
-        return {
-            "question": topic,
-            "analysis": analysis,
-            "sources": sources,
-            "agent_type": "synthesize",
-        }
+        return (await self.arun_multi(topic, ("synthesize",), n_results))[0]
 
-    def analyze_trends(self, topic: str, n_results: int = 10) -> Dict:
+    async def aanalyze_trends(self, topic: str, n_results: int = 10) -> Dict:
         """Trend analysis agent -- identify research trends and directions.
 
         Searches for chunks related to *topic*, then asks GLM-4 to identify
         emerging trends, methodology evolution, shifts in focus, and
         predicted future directions.
         """
-        context, sources = self._search_and_build_context(topic, n_results)
-
-        if not context:
-            return self._no_results_response(topic, "trends")
-
-        prompt = (
-            "You are a research trend analyst. Given excerpts from "
-            f"research papers about {topic}, identify: "
-            "1) Emerging trends and directions, "
-            "2) Evolution of methodologies over time, "
-            "3) Shifts in research focus, "
-            "4) Predicted future directions based on current trajectory."
-            "\n\nResearch excerpts:\n"
-            f"{context}"
-            "\n\nTrend Analysis:"
-        )
-
-        analysis = self.rag_pipeline.query_glm4(prompt)
-
-        return {
-            "question": topic,
-            "analysis": analysis,
-            "sources": sources,
-            "agent_type": "trends",
-        }
+        return (await self.arun_multi(topic, ("trends",), n_results))[0]
 
-    def find_gaps(self, topic: str, n_results: int = 10) -> Dict:
+    async def afind_gaps(self, topic: str, n_results: int = 10) -> Dict:
         """Gap finding agent -- identify research gaps and opportunities.
 
         Searches for chunks related to *topic*, then asks GLM-4 to identify
         under-explored areas, methodological limitations, contradictions,
         missing perspectives, and suggested future work.
         """
-        context, sources = self._search_and_build_context(topic, n_results)
-
-        if not context:
-            return self._no_results_response(topic, "gaps")
-
-        prompt = (
-            "You are a research gap analyst. Given excerpts from "
-            f"research papers about {topic}, identify: "
-            "1) Under-explored areas mentioned but not studied, "
-            "2) Methodological limitations acknowledged by authors, "
-            "3) Contradictions that need resolution, "
-            "4) Missing perspectives or populations, "
-            "5) Suggested future work by authors."
-            "\n\nResearch excerpts:\n"
-            f"{context}"
-            "\n\nGap Analysis:"
-        )
-
-        analysis = self.rag_pipeline.query_glm4(prompt)
-
-        return {
-            "question": topic,
-            "analysis": analysis,
-            "sources": sources,
-            "agent_type": "gaps",
-        }
+        return (await self.arun_multi(topic, ("gaps",), n_results))[0]
 
-    def run_agent(
+    async def arun_agent(
         self, agent_type: str, question: str, n_results: int = 10
     ) -> Dict:
-        """Route to the appropriate agent method based on *agent_type*.
+        """Route to the appropriate agent based on *agent_type*.
 
         Args:
             agent_type: One of "synthesize", "trends", or "gaps".
@@ -189,17 +468,111 @@ class ResearchAgents:
         Raises:
             ValueError: If *agent_type* is not recognized.
         """
-        router = {
-            "synthesize": self.synthesize,
-            "trends": self.analyze_trends,
-            "gaps": self.find_gaps,
-        }
+        return (await self.arun_multi(question, (agent_type,), n_results))[0]
+
+    async def arun_agent_batch(
+        self, requests, n_results: int = 10, concurrency: int = 16
+    ) -> List[Dict]:
+        """Run many ``(agent_type, question)`` requests concurrently.
+
+        At most *concurrency* LLM requests are in flight at once, so the
+        backend is not flooded (match it to e.g. ``OLLAMA_NUM_PARALLEL``).
+        A call backing off after a transient error gives up its slot.
+
+        Args:
+            requests:    Iterable of ``(agent_type, question)`` pairs.
+            n_results:   Number of chunks to retrieve per request.
+            concurrency: Maximum number of LLM requests running at a time.
+
+        Returns:
+            A list of response dicts in the same order as *requests*.
+
+        Raises:
+            ValueError: If any agent type is not recognized (checked before
+                        any request is sent).
+        """
+        requests = list(requests)
+        for agent_type, _ in requests:
+            if agent_type not in self.AGENT_TYPES:
+                raise ValueError(
+                    f"Unknown agent_type '{agent_type}'. "
+                    f"Must be one of: {', '.join(self.AGENT_TYPES)}"
+                )
+
+        limiter = asyncio.Semaphore(concurrency)
+        responses = await asyncio.gather(*(
+            self.arun_multi(question, (agent_type,), n_results, limiter=limiter)
+            for agent_type, question in requests
+        ))
+        return [response[0] for response in responses]
+
+    async def arun_all(self, topic: str, n_results: int = 10) -> List[Dict]:
+        """Run all three agents on *topic* with one shared retrieval.
+
+        Returns:
+            A list of response dicts ordered as in ``AGENT_TYPES``.
+        """
+        return await self.arun_multi(topic, self.AGENT_TYPES, n_results)
+
+    async def arun_all_batched(self, topic: str, n_results: int = 10) -> List[Dict]:
+        """Run all three agents on *topic* with a single LLM call.
+
+        The shared context is sent once with three labeled task blocks,
+        and the JSON reply is split back into one response per agent.
+
+        Returns:
+            A list of response dicts ordered as in ``AGENT_TYPES``.
+        """
+        return await self.arun_multi(topic, self.AGENT_TYPES, n_results, batched=True)
+
+    # ------------------------------------------------------------------
+    # Synchronous wrappers (must not be called from a running event loop)
+    # ------------------------------------------------------------------
+
+    def _run(self, coro):
+        """Run *coro* in a fresh event loop, then close the pipeline's client for it."""
+        async def run_and_close():
+            try:
+                return await coro
+            finally:
+                await self.rag_pipeline.aclose()
+
+        return asyncio.run(run_and_close())
 
-        agent_fn = router.get(agent_type)
-        if agent_fn is None:
-            raise ValueError(
-                f"Unknown agent_type '{agent_type}'. "
-                f"Must be one of: {', '.join(self.AGENT_TYPES)}"
-            )
+    def synthesize(self, topic: str, n_results: int = 10) -> Dict:
+        """Blocking wrapper around :meth:`asynthesize`."""
+        return self._run(self.asynthesize(topic, n_results))
+
+    def analyze_trends(self, topic: str, n_results: int = 10) -> Dict:
+        """Blocking wrapper around :meth:`aanalyze_trends`."""
+        return self._run(self.aanalyze_trends(topic, n_results))
 
-        return agent_fn(question, n_results)
+    def find_gaps(self, topic: str, n_results: int = 10) -> Dict:
+        """Blocking wrapper around :meth:`afind_gaps`."""
+        return self._run(self.afind_gaps(topic, n_results))
+
+    def run_agent(
+        self, agent_type: str, question: str, n_results: int = 10
+    ) -> Dict:
+        """Blocking wrapper around :meth:`arun_agent`."""
+        return self._run(self.arun_agent(agent_type, question, n_results))
+
+    def run_agent_batch(
+        self, requests, n_results: int = 10, concurrency: int = 16
+    ) -> List[Dict]:
+        """Blocking wrapper around :meth:`arun_agent_batch`."""
+        return self._run(self.arun_agent_batch(requests, n_results, concurrency))
+
+    def run_multi(
+        self, topic: str, agent_types, n_results: int = 10
+    ) -> List[Dict]:
+        """Blocking wrapper around :meth:`arun_multi`."""
+        return self._run(self.arun_multi(topic, agent_types, n_results))
+
+    def run_all(self, topic: str, n_results: int = 10) -> List[Dict]:
+        """Blocking wrapper around :meth:`arun_all`."""
+        return self._run(self.arun_all(topic, n_results))
+
+    def run_all_batched(self, topic: str, n_results: int = 10) -> List[Dict]:
+        """Blocking wrapper around :meth:`arun_all_batched`."""
+        return self._run(self.arun_all_batched(topic, n_results))
@@ -6,95 +6,116 @@ and produces semantically meaningful chunks that respect both section
 boundaries and sentence boundaries. Falls back to sentence-boundary
 chunking when section headers are not detected.
 """
+import bisect
+import itertools
 import re
-from typing import List, Dict, Optional, Tuple
+import sys
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
 
 
 # ---------------------------------------------------------------------------
 # Section header patterns
 # ---------------------------------------------------------------------------
-# Each pattern is designed to match common academic formatting variants:
+# A single alternation matches every header style in one pass over the text:
 #   ABSTRACT / Abstract / 1. Introduction / II. Methods / 3 RESULTS AND DISCUSSION
-# We capture the canonical section name from each match.
+# Each named group corresponds to one canonical section; ``m.lastgroup``
+# tells us which one matched.
 
-_SECTION_PATTERNS: List[Tuple[re.Pattern, str]] = [
+_SECTION_HEADER = re.compile(
+    r"^[\s]*(?:"
     # Abstract — often standalone, no numbering
-    (re.compile(
-        r"^[\s]*(?:abstract)[\s]*$",
-        re.IGNORECASE | re.MULTILINE,
-    ), "Abstract"),
-
-    # Introduction
-    (re.compile(
-        r"^[\s]*(?:[0-9]+[.\s]*|[IVX]+[.\s]+)?introduction[\s]*$",
-        re.IGNORECASE | re.MULTILINE,
-    ), "Introduction"),
-
-    # Background
-    (re.compile(
-        r"^[\s]*(?:[0-9]+[.\s]*|[IVX]+[.\s]+)?background[\s]*$",
-        re.IGNORECASE | re.MULTILINE,
-    ), "Background"),
-
-    # Related Work
-    (re.compile(
-        r"^[\s]*(?:[0-9]+[.\s]*|[IVX]+[.\s]+)?related[\s]+work[\s]*$",
-        re.IGNORECASE | re.MULTILINE,
-    ), "Related Work"),
-
-    # Methods / Methodology
-    (re.compile(
-        r"^[\s]*(?:[0-9]+[.\s]*|[IVX]+[.\s]+)?(?:methods?|methodology)[\s]*$",
-        re.IGNORECASE | re.MULTILINE,
-    ), "Methods"),
-
+    r"(?P<Abstract>abstract)"
+    r"|(?:[0-9]+[.\s]*|[IVX]+[.\s]+)?(?:"
+    r"(?P<Introduction>introduction)"
+    r"|(?P<Background>background)"
+    r"|(?P<Related_Work>related[\s]+work)"
+    r"|(?P<Methods>methods?|methodology)"
     # Results (including compound headers like "Results and Discussion")
-    (re.compile(
-        r"^[\s]*(?:[0-9]+[.\s]*|[IVX]+[.\s]+)?results(?:\s+and\s+discussion)?[\s]*$",
-        re.IGNORECASE | re.MULTILINE,
-    ), "Results"),
-
-    # Discussion (standalone)
-    (re.compile(
-        r"^[\s]*(?:[0-9]+[.\s]*|[IVX]+[.\s]+)?discussion[\s]*$",
-        re.IGNORECASE | re.MULTILINE,
-    ), "Discussion"),
-
-    # Conclusion(s)
-    (re.compile(
-        r"^[\s]*(?:[0-9]+[.\s]*|[IVX]+[.\s]+)?conclusions?[\s]*$",
-        re.IGNORECASE | re.MULTILINE,
-    ), "Conclusion"),
-
-    # Limitations
-    (re.compile(
-        r"^[\s]*(?:[0-9]+[.\s]*|[IVX]+[.\s]+)?limitations?[\s]*$",
-        re.IGNORECASE | re.MULTILINE,
-    ), "Limitations"),
-
-    # References / Bibliography
-    (re.compile(
-        r"^[\s]*(?:[0-9]+[.\s]*|[IVX]+[.\s]+)?(?:references|bibliography)[\s]*$",
-        re.IGNORECASE | re.MULTILINE,
-    ), "References"),
-]
+    r"|(?P<Results>results(?:[\s]+and[\s]+discussion)?)"
+    r"|(?P<Discussion>discussion)"
+    r"|(?P<Conclusion>conclusions?)"
+    r"|(?P<Limitations>limitations?)"
+    r"|(?P<References>references|bibliography)"
+    r"))[\s]*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+# Group name -> canonical section name (group names cannot contain spaces).
+# Names are interned so every chunk of a section shares one string object
+# and downstream filters can compare them by identity.
+_SECTION_NAMES: Dict[str, str] = {
+    group: sys.intern(group.replace("_", " ")) for group in _SECTION_HEADER.groupindex
+}
+_FULL_TEXT = sys.intern("Full Text")
+_PREAMBLE = sys.intern("Preamble")
 
 # Sentence-ending punctuation followed by whitespace (space, newline, or end)
-_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])(?:\s+)")
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])[\s]+")
+
+
+def _ascii_variant(pattern: "re.Pattern") -> "re.Pattern":
+    r"""Recompile *pattern* with ``re.ASCII`` for text known to be ASCII.
+
+    ASCII-mode classes and case folding are cheaper than their Unicode
+    counterparts.  Unicode ``\s`` also matches the separators ``\x1c``-``\x1f``,
+    which are ASCII, so they are added to every ``\s`` (all of which sit
+    inside character classes) to keep matches identical on ASCII input.
+    """
+    return re.compile(
+        pattern.pattern.replace(r"\s", r"\s\x1c-\x1f"),
+        (pattern.flags & ~re.UNICODE) | re.ASCII,
+    )
+
+
+# Used when ``text.isascii()`` -- typical of extracted paper text.
+_SECTION_HEADER_ASCII = _ascii_variant(_SECTION_HEADER)
+_SENTENCE_BOUNDARY_ASCII = _ascii_variant(_SENTENCE_BOUNDARY)
+
+
+# ---------------------------------------------------------------------------
+# Chunk record
+# ---------------------------------------------------------------------------
+
+@dataclass(slots=True)
+class Chunk:
+    """One chunk of a paper.
+
+    Slotted, so a large ingest holds a compact record per chunk instead of
+    a four-key dict.  Use :meth:`to_dict` where a plain dict is needed.
+    """
+
+    text: str
+    section: str
+    source: str
+    chunk_id: int
+
+    def to_dict(self) -> Dict:
+        """Return the chunk as a ``text``/``section``/``source``/``chunk_id`` dict."""
+        return asdict(self)
 
 
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
-def _split_sentences(text: str) -> List[str]:
-    """Split *text* into sentences using punctuation + whitespace boundaries.
+def _iter_sentences(text: str) -> Iterator[str]:
+    """Yield the sentences of *text* using punctuation + whitespace boundaries.
 
     Keeps each sentence's trailing punctuation attached.  Empty fragments
-    are discarded.
+    are discarded.  Sentences are sliced out lazily between boundary
+    matches, so no intermediate list of raw fragments is built.
     """
-    parts = _SENTENCE_BOUNDARY.split(text)
-    return [s.strip() for s in parts if s.strip()]
+    boundary = _SENTENCE_BOUNDARY_ASCII if text.isascii() else _SENTENCE_BOUNDARY
+    start = 0
+    for m in boundary.finditer(text):
+        sentence = text[start:m.start()].strip()
+        if sentence:
+            yield sentence
+        start = m.end()
+    tail = text[start:].strip()
+    if tail:
+        yield tail
 
 
 # ---------------------------------------------------------------------------
@@ -141,25 +162,24 @@ class SectionChunker:
         detected the entire text is returned under the section name
         ``"Full Text"``.
         """
-        # Collect all matches with their positions
-        matches: List[Tuple[int, int, str]] = []  # (start, end, section_name)
-        for pattern, section_name in _SECTION_PATTERNS:
-            for m in pattern.finditer(text):
-                matches.append((m.start(), m.end(), section_name))
+        header = _SECTION_HEADER_ASCII if text.isascii() else _SECTION_HEADER
+
+        # Collect all header matches (already in document order)
+        matches: List[Tuple[int, int, str]] = [  # (start, end, section_name)
+            (m.start(), m.end(), _SECTION_NAMES[m.lastgroup])
+            for m in header.finditer(text)
+        ]
 
         if not matches:
             # Fallback — no recognisable sections
-            return [{"section": "Full Text", "text": text}]
-
-        # Sort by position in the document
-        matches.sort(key=lambda t: t[0])
+            return [{"section": _FULL_TEXT, "text": text}]
 
         sections: List[Dict] = []
 
         # Text before the first detected header (e.g. title / author block)
         pre_text = text[: matches[0][0]].strip()
         if pre_text:
-            sections.append({"section": "Preamble", "text": pre_text})
+            sections.append({"section": _PREAMBLE, "text": pre_text})
 
         for idx, (start, end, name) in enumerate(matches):
             # Content runs from end of this header to start of the next
@@ -174,112 +194,114 @@ class SectionChunker:
 
         return sections
 
-    def chunk_section(
+    def iter_section_chunks(
         self,
         section_text: str,
         section_name: str,
         source: str,
         start_id: int = 0,
         effective_chunk_size: Optional[int] = None,
-    ) -> List[Dict]:
-        """Chunk a single section's text into overlapping pieces.
+    ) -> Iterator[Chunk]:
+        """Yield a single section's text as overlapping :class:`Chunk` records.
 
         Each chunk respects sentence boundaries so no word is cut in
-        half.  Returns a list of dicts with keys
-        ``text``, ``section``, ``source``, ``chunk_id``.
+        half.
 
         Parameters
         ----------
         effective_chunk_size : int, optional
             Override ``self.chunk_size`` for this call. Used by
-            ``chunk_paper`` to apply section-specific sizes.
+            ``iter_chunks`` to apply section-specific sizes.
         """
         chunk_size = effective_chunk_size if effective_chunk_size is not None else self.chunk_size
 
-        sentences = _split_sentences(section_text)
+        sentences = list(_iter_sentences(section_text))
         if not sentences:
-            return []
+            return
 
         overlap_chars = int(chunk_size * self.overlap_ratio)
-        chunks: List[Dict] = []
         chunk_id = start_id
 
-        current_sentences: List[str] = []
-        current_len = 0
+        # pref[k] is the length of sentences[:k] counting one joining space
+        # per sentence, so " ".join(sentences[l:r]) has length
+        # pref[r] - pref[l] - 1.
+        pref = [0, *itertools.accumulate(len(s) + 1 for s in sentences)]
+        n = len(sentences)
+
+        # The window sentences[left:right] only ever moves forward.
+        left = right = 0
+        while right < n:
+            # The next sentence always fits (the overlap below leaves room
+            # for it), or it starts an otherwise empty window.  Beyond it,
+            # extend to the furthest end r with pref[r] - pref[left] - 1
+            # <= chunk_size, found by a C-level bisect over the prefix sums.
+            right = max(
+                right + 1,
+                bisect.bisect_right(pref, pref[left] + 1 + chunk_size, right + 1) - 1,
+            )
 
-        i = 0
-        while i < len(sentences):
-            sentence = sentences[i]
+            yield Chunk(" ".join(sentences[left:right]), section_name, source, chunk_id)
+            chunk_id += 1
+
+            if not overlap_chars:
+                # No overlap: the next window starts where this one ended.
+                left = right
+            elif right < n:
+                # Overlap: the longest suffix of the emitted window that fits
+                # in *overlap_chars* and still leaves room for the next
+                # sentence within *chunk_size*.
+                left = bisect.bisect_left(
+                    pref,
+                    max(
+                        pref[right] - 1 - overlap_chars,
+                        pref[right + 1] - 1 - chunk_size,
+                    ),
+                    left + 1,
+                    right,
+                )
 
-            # If adding this sentence still fits, accumulate
-            projected = current_len + len(sentence) + (1 if current_sentences else 0)
-            if projected <= chunk_size or not current_sentences:
-                current_sentences.append(sentence)
-                current_len = projected
-                i += 1
-            else:
-                # Emit current chunk
-                chunk_text = " ".join(current_sentences)
-                chunks.append({
-                    "text": chunk_text,
-                    "section": section_name,
-                    "source": source,
-                    "chunk_id": chunk_id,
-                })
-                chunk_id += 1
-
-                # Rewind for overlap — walk backwards through accumulated
-                # sentences until we have at least *overlap_chars* worth.
-                overlap_sentences: List[str] = []
-                overlap_len = 0
-                for s in reversed(current_sentences):
-                    if overlap_len + len(s) + (1 if overlap_sentences else 0) > overlap_chars:
-                        break
-                    overlap_sentences.insert(0, s)
-                    overlap_len += len(s) + (1 if len(overlap_sentences) > 1 else 0)
-
-                current_sentences = list(overlap_sentences)
-                current_len = sum(len(s) for s in current_sentences) + max(0, len(current_sentences) - 1)
-                # Do NOT advance *i* — the sentence that didn't fit will
-                # be reconsidered on the next iteration.
-
-        # Flush remaining sentences
-        if current_sentences:
-            chunk_text = " ".join(current_sentences)
-            chunks.append({
-                "text": chunk_text,
-                "section": section_name,
-                "source": source,
-                "chunk_id": chunk_id,
-            })
-
-        return chunks
-
-    def chunk_paper(self, text: str, source: str) -> List[Dict]:
-        """Main entry point: chunk an entire paper's text.
+    def chunk_section(
+        self,
+        section_text: str,
+        section_name: str,
+        source: str,
+        start_id: int = 0,
+        effective_chunk_size: Optional[int] = None,
+    ) -> List[Chunk]:
+        """Chunk a single section's text into overlapping pieces.
+
+        Returns the records of :meth:`iter_section_chunks` as a list.
+        """
+        return list(self.iter_section_chunks(
+            section_text, section_name, source, start_id, effective_chunk_size
+        ))
+
+    def iter_chunks(self, text: str, source: str) -> Iterator[Chunk]:
+        """Main entry point: lazily chunk an entire paper's text.
 
         1. Detect sections in *text*.
-        2. For each section, produce sentence-boundary-respecting chunks
+        2. For each section, yield sentence-boundary-respecting chunks
            with the configured overlap.
-        3. Return a flat list of chunk dicts, each with a globally unique
-           ``chunk_id``.
-        """
-        sections = self.detect_sections(text)
+        3. Every :class:`Chunk` carries a globally unique ``chunk_id``.
 
-        all_chunks: List[Dict] = []
+        Chunks are produced as they are cut, so a consumer (e.g. an
+        embedding batcher) can start before the whole paper is chunked.
+        """
         running_id = 0
 
-        for section in sections:
+        for section in self.detect_sections(text):
             section_name = section["section"]
             effective_size = self.SECTION_CHUNK_SIZES.get(section_name, self.chunk_size)
-            new_chunks = self.chunk_section(
+            for chunk in self.iter_section_chunks(
                 section_text=section["text"],
                 section_name=section_name,
                 source=source,
                 start_id=running_id,
                 effective_chunk_size=effective_size,
-            )
-            all_chunks.extend(new_chunks)
-            running_id += len(new_chunks)
+            ):
+                running_id += 1
+                yield chunk
 
-        return all_chunks
+    def chunk_paper(self, text: str, source: str) -> List[Chunk]:
+        """Chunk an entire paper's text; :meth:`iter_chunks` as a list."""
+        return list(self.iter_chunks(text, source))
@@ -5,16 +5,70 @@ Uses GLM-4 via Ollama as the judge model to evaluate RAG quality
 across four dimensions: faithfulness, answer relevancy,
 context precision, and context recall.
 """
+import asyncio
+import contextlib
+import hashlib
 import os
+import threading
 import requests
-import json
+from requests.adapters import HTTPAdapter
+import httpx
+import orjson
+import numpy as np
 import re
-from typing import List, Dict
+from collections import OrderedDict
+from typing import List, Dict, Optional
 
 
 # Configuration
 OLLAMA_URL = os.environ.get("OLLAMA_HOST", "http://host.docker.internal:11434")
 MODEL_NAME = os.environ.get("MODEL_NAME", "glm-4.7-flash")
+# Context window for every judge request; the same setting as app.rag's, so
+# switching between answering and judging does not reload the model.
+OLLAMA_NUM_CTX = int(os.environ.get("OLLAMA_NUM_CTX", "4096"))
+
+# Character budgets for the context and the answer embedded in a single
+# judge prompt; together with the instructions they fit OLLAMA_NUM_CTX.
+MAX_CTX_CHARS = 8000
+MAX_ANSWER_CHARS = 4000
+_TRUNCATION_MARKER = "\n... [truncated] ...\n"
+
+# Score parsing: "X/10" or "X out of 10", else the first number.
+_RE_FRACTION = re.compile(r"(\d+(?:\.\d+)?)\s*(?:/|out of)\s*10")
+_RE_NUMBER = re.compile(r"(\d+(?:\.\d+)?)")
+# A streamed score is settled once the reply holds a complete "X/10" (the
+# first fraction wins in _parse_score whatever follows) or opens with a lone
+# number on its own line, which is taken as the score.  Anything else is
+# read to the end of the stream.
+_RE_SCORE_DONE = re.compile(
+    r"\d+(?:\.\d+)?\s*(?:/|out of)\s*10|\A\s*\d+(?:\.\d+)?[ \t]*\r?\n"
+)
+
+# Q&A generation: a JSON array, or "Q: ...?" / "A: ..." lines as a fallback.
+_RE_JSON_ARRAY = re.compile(r"\[.*\]", re.DOTALL)
+_RE_QUESTION = re.compile(r"(?:Q\d*[:.]|Question\s*\d*[:.])?\s*(.+\?)", re.IGNORECASE)
+_RE_ANSWER = re.compile(r"(?:A\d*[:.]|Answer\s*\d*[:.])?\s*(.+)", re.IGNORECASE)
+
+
+def _trim(text: str, limit: int = MAX_CTX_CHARS) -> str:
+    """
+    Deterministically cap *text* at *limit* characters.
+
+    Keeps the head and the tail, joined by a truncation marker, so the
+    first and last passages both stay visible to the judge.
+    """
+    if len(text) <= limit:
+        return text
+    keep = max(limit - len(_TRUNCATION_MARKER), 0)
+    head = (keep + 1) // 2
+    return text[:head] + _TRUNCATION_MARKER + text[len(text) - (keep - head):]
+
+
+def _number_contexts(contexts: List[str]) -> str:
+    """Join *contexts* as labeled ``[Context i]`` passages for judge prompts."""
+    return "\n\n---\n\n".join(
+        f"[Context {i + 1}]: {ctx}" for i, ctx in enumerate(contexts)
+    )
 
 
 class RAGEvaluator:
@@ -23,6 +77,8 @@ class RAGEvaluator:
     to score RAG pipeline outputs across four key metrics.
     """
 
+    JUDGE_CACHE_SIZE = 1024
+
     def __init__(self, ollama_url: str = OLLAMA_URL, model_name: str = MODEL_NAME):
         """
         Initialize the evaluator with Ollama configuration.
@@ -34,28 +90,117 @@ class RAGEvaluator:
         self.ollama_url = ollama_url
         self.model_name = model_name
 
-    def query_llm(self, prompt: str) -> str:
+        # Pooled keep-alive connections so repeated judge calls skip the
+        # TCP handshake to Ollama.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # Pooled async client, created lazily in the event loop that uses it.
+        self._aclient: Optional[httpx.AsyncClient] = None
+        self._aclient_loop = None
+
+        # blake2b(prompt) -> response, kept in LRU order.  Identical judge
+        # prompts (the same passage or question/answer judged again during a
+        # suite run) are answered without another generation.
+        self._judge_cache: "OrderedDict[bytes, str]" = OrderedDict()
+        self._judge_cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def close(self):
+        """Release the pooled sync HTTP connections (see also :meth:`aclose`)."""
+        self.session.close()
+
+    def cache_info(self) -> Dict:
+        """Return judge-cache statistics: hits, misses, hit_rate and size."""
+        total = self.cache_hits + self.cache_misses
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": round(self.cache_hits / total, 4) if total else 0.0,
+            "size": len(self._judge_cache),
+        }
+
+    @staticmethod
+    def _prompt_key(prompt: str) -> bytes:
+        """Hash *prompt* into a compact judge-cache key."""
+        return hashlib.blake2b(prompt.encode(), digest_size=16).digest()
+
+    def _cache_get(self, key: bytes) -> Optional[str]:
+        """Return the cached response for *key*, updating hit statistics."""
+        with self._judge_cache_lock:
+            response = self._judge_cache.get(key)
+            if response is None:
+                self.cache_misses += 1
+                return None
+            self._judge_cache.move_to_end(key)
+            self.cache_hits += 1
+            return response
+
+    def _cache_put(self, key: bytes, response: str):
+        """Cache a successful judge response, evicting the oldest entry."""
+        if response.startswith("Error"):
+            return
+        with self._judge_cache_lock:
+            self._judge_cache[key] = response
+            self._judge_cache.move_to_end(key)
+            while len(self._judge_cache) > self.JUDGE_CACHE_SIZE:
+                self._judge_cache.popitem(last=False)
+
+    def query_llm(self, prompt: str, early_stop: Optional[re.Pattern] = None) -> str:
         """
         Call the Ollama API to generate a response from the judge model.
 
         Args:
             prompt: The prompt to send to the model.
+            early_stop: If given, stream the response and stop reading as
+                soon as the text so far matches this pattern.
 
         Returns:
             The model's text response, or an error message string.
         """
+        key = self._prompt_key(prompt)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        response = self._post_llm(prompt, early_stop)
+        self._cache_put(key, response)
+        return response
+
+    def _generate_body(self, prompt: str, early_stop: Optional[re.Pattern]) -> Dict:
+        """Build the /api/generate request body for *prompt*."""
+        return {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": early_stop is not None,
+            "options": {"num_ctx": OLLAMA_NUM_CTX},
+        }
+
+    def _post_llm(self, prompt: str, early_stop: Optional[re.Pattern] = None) -> str:
+        """Send *prompt* to Ollama over the pooled session (no caching)."""
         try:
-            response = requests.post(
+            with self.session.post(
                 f"{self.ollama_url}/api/generate",
-                json={
-                    "model": self.model_name,
-                    "prompt": prompt,
-                    "stream": False,
-                },
+                json=self._generate_body(prompt, early_stop),
                 timeout=120,
-            )
-            response.raise_for_status()
-            return response.json().get("response", "No response from model")
+                stream=early_stop is not None,
+            ) as response:
+                response.raise_for_status()
+                if early_stop is None:
+                    return orjson.loads(response.content).get("response", "No response from model")
+
+                # Closing the response on exit drops the connection, which
+                # makes Ollama stop generating.
+                text = ""
+                for line in response.iter_lines():
+                    if line:
+                        text += orjson.loads(line).get("response", "")
+                        if early_stop.search(text):
+                            break
+                return text or "No response from model"
         except requests.exceptions.Timeout:
             return "Error: LLM request timed out after 120 seconds"
         except requests.exceptions.ConnectionError:
@@ -63,6 +208,105 @@ class RAGEvaluator:
         except Exception as e:
             return f"Error calling LLM: {str(e)}"
 
+    async def _aquery_llm(
+        self,
+        client: httpx.AsyncClient,
+        prompt: str,
+        early_stop: Optional[re.Pattern] = None,
+    ) -> str:
+        """
+        Async variant of query_llm over a shared client, so judge calls can overlap.
+
+        Args:
+            client: An httpx.AsyncClient whose base_url is the Ollama server.
+            prompt: The prompt to send to the model.
+            early_stop: As for query_llm.
+
+        Returns:
+            The model's text response, or an error message string.
+        """
+        key = self._prompt_key(prompt)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        response = await self._apost_llm(client, prompt, early_stop)
+        self._cache_put(key, response)
+        return response
+
+    async def _apost_llm(
+        self,
+        client: httpx.AsyncClient,
+        prompt: str,
+        early_stop: Optional[re.Pattern] = None,
+    ) -> str:
+        """Send *prompt* to Ollama over *client* (no caching)."""
+        try:
+            body = self._generate_body(prompt, early_stop)
+            if early_stop is None:
+                response = await client.post("/api/generate", json=body)
+                response.raise_for_status()
+                return orjson.loads(response.content).get("response", "No response from model")
+
+            text = ""
+            async with client.stream("POST", "/api/generate", json=body) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if line:
+                        text += orjson.loads(line).get("response", "")
+                        if early_stop.search(text):
+                            break
+            return text or "No response from model"
+        except httpx.TimeoutException:
+            return "Error: LLM request timed out after 120 seconds"
+        except httpx.ConnectError:
+            return "Error: Could not connect to Ollama server"
+        except Exception as e:
+            return f"Error calling LLM: {str(e)}"
+
+    def _query_score(self, prompt: str) -> float:
+        """Ask the judge a 0-10 scoring *prompt*, stopping once the score is out."""
+        return self._parse_score(self.query_llm(prompt, _RE_SCORE_DONE))
+
+    async def _aquery_score(self, client: httpx.AsyncClient, prompt: str) -> float:
+        """Async variant of _query_score."""
+        return self._parse_score(await self._aquery_llm(client, prompt, _RE_SCORE_DONE))
+
+    def _async_client(self) -> httpx.AsyncClient:
+        """
+        Return the pooled async client for the running event loop.
+
+        The client is kept across evaluations so concurrent judge calls
+        share keep-alive connections.  Connections belong to the loop that
+        opened them, so a new client is created if the loop has changed.
+        """
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aclient_loop is not loop:
+            self._aclient = httpx.AsyncClient(
+                base_url=self.ollama_url,
+                timeout=httpx.Timeout(120.0),
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=32),
+            )
+            self._aclient_loop = loop
+        return self._aclient
+
+    async def aclose(self):
+        """Close the pooled async client, if any."""
+        if self._aclient is not None:
+            await self._aclient.aclose()
+            self._aclient = None
+            self._aclient_loop = None
+
+    def _run(self, coro):
+        """Run *coro* to completion in a fresh event loop, then close its client."""
+        async def run_and_close():
+            try:
+                return await coro
+            finally:
+                await self.aclose()
+
+        return asyncio.run(run_and_close())
+
     def _parse_score(self, response: str) -> float:
         """
         Robustly parse a numeric score from an LLM response.
@@ -79,15 +323,25 @@ class RAGEvaluator:
         if not response or response.startswith("Error"):
             return 0.5
 
+        # Fast path: the judge usually answers with just the number, as asked.
+        # Only a bare "7" / "7.5" is taken here; anything else goes through
+        # the regexes below, which give the same result for these inputs.
+        stripped = response.strip()
+        if stripped[:1].isdecimal() and stripped.replace(".", "", 1).isdecimal():
+            return min(float(stripped), 10.0) / 10.0
+
         # Try to find a decimal or integer number in the response.
-        # Prioritize patterns like "X/10" or "X out of 10" first.
-        pattern_fraction = re.search(r"(\d+(?:\.\d+)?)\s*(?:/|out of)\s*10", response)
-        if pattern_fraction:
-            score = float(pattern_fraction.group(1))
-            return max(0.0, min(1.0, score / 10.0))
+        # Prioritize patterns like "X/10" or "X out of 10" first.  Most
+        # replies have neither marker, which a plain substring scan rules
+        # out far more cheaply than the regex search.
+        if "/" in response or "out of" in response:
+            pattern_fraction = _RE_FRACTION.search(response)
+            if pattern_fraction:
+                score = float(pattern_fraction.group(1))
+                return max(0.0, min(1.0, score / 10.0))
 
         # Look for any number (first occurrence) in the response.
-        pattern_number = re.search(r"(\d+(?:\.\d+)?)", response)
+        pattern_number = _RE_NUMBER.search(response)
         if pattern_number:
             score = float(pattern_number.group(1))
             # If the number is in 0-10 range, normalize to 0-1.
@@ -115,12 +369,22 @@ class RAGEvaluator:
         Returns:
             A float from 0.0 (completely unfaithful) to 1.0 (fully faithful).
         """
-        prompt = (
+        return self._query_score(self._faithfulness_prompt(answer, context))
+
+    async def ascore_faithfulness(
+        self, client: httpx.AsyncClient, answer: str, context: str
+    ) -> float:
+        """Async variant of score_faithfulness using the shared *client*."""
+        return await self._aquery_score(client, self._faithfulness_prompt(answer, context))
+
+    def _faithfulness_prompt(self, answer: str, context: str) -> str:
+        """Build the faithfulness judge prompt."""
+        return (
             "You are an impartial judge evaluating the faithfulness of an AI-generated answer.\n\n"
             "Faithfulness measures whether every claim in the answer is supported by the given context. "
             "An answer is faithful if it makes no claims that go beyond what the context states.\n\n"
-            f"CONTEXT:\n{context}\n\n"
-            f"ANSWER:\n{answer}\n\n"
+            f"CONTEXT:\n{_trim(context)}\n\n"
+            f"ANSWER:\n{_trim(answer, MAX_ANSWER_CHARS)}\n\n"
             "Given the context, is every claim in the answer supported? "
             "Rate the faithfulness on a scale of 0 to 10, where:\n"
             "  0 = The answer is entirely fabricated with no basis in the context\n"
@@ -128,8 +392,6 @@ class RAGEvaluator:
             "  10 = Every single claim in the answer is directly supported by the context\n\n"
             "Respond with ONLY a single number from 0 to 10."
         )
-        response = self.query_llm(prompt)
-        return self._parse_score(response)
 
     def score_answer_relevancy(self, question: str, answer: str) -> float:
         """
@@ -145,12 +407,22 @@ class RAGEvaluator:
         Returns:
             A float from 0.0 (completely irrelevant) to 1.0 (perfectly relevant).
         """
-        prompt = (
+        return self._query_score(self._relevancy_prompt(question, answer))
+
+    async def ascore_answer_relevancy(
+        self, client: httpx.AsyncClient, question: str, answer: str
+    ) -> float:
+        """Async variant of score_answer_relevancy using the shared *client*."""
+        return await self._aquery_score(client, self._relevancy_prompt(question, answer))
+
+    def _relevancy_prompt(self, question: str, answer: str) -> str:
+        """Build the answer relevancy judge prompt."""
+        return (
             "You are an impartial judge evaluating the relevancy of an AI-generated answer to a question.\n\n"
             "Answer relevancy measures whether the answer directly addresses the question asked. "
             "A relevant answer is focused, on-topic, and provides the information the question seeks.\n\n"
             f"QUESTION:\n{question}\n\n"
-            f"ANSWER:\n{answer}\n\n"
+            f"ANSWER:\n{_trim(answer, MAX_ANSWER_CHARS)}\n\n"
             "Does the answer directly and completely address the question? "
             "Rate the answer relevancy on a scale of 0 to 10, where:\n"
             "  0 = The answer is completely irrelevant to the question\n"
@@ -158,8 +430,6 @@ class RAGEvaluator:
             "  10 = The answer perfectly and completely addresses exactly what was asked\n\n"
             "Respond with ONLY a single number from 0 to 10."
         )
-        response = self.query_llm(prompt)
-        return self._parse_score(response)
 
     def score_context_precision(self, question: str, contexts: List[str]) -> float:
         """
@@ -178,28 +448,57 @@ class RAGEvaluator:
         if not contexts:
             return 0.0
 
-        scores = []
-        for i, context in enumerate(contexts):
-            prompt = (
-                "You are an impartial judge evaluating whether a retrieved context passage "
-                "is relevant to answering a question.\n\n"
-                "Context precision measures whether the retrieved passage contains information "
-                "that would be useful for answering the question.\n\n"
-                f"QUESTION:\n{question}\n\n"
-                f"RETRIEVED CONTEXT (passage {i + 1}):\n{context}\n\n"
-                "Is this context passage relevant and useful for answering the question? "
-                "Rate the relevance on a scale of 0 to 10, where:\n"
-                "  0 = The passage is completely irrelevant to the question\n"
-                "  5 = The passage has some tangential relevance but is mostly unhelpful\n"
-                "  10 = The passage is highly relevant and directly useful for answering\n\n"
-                "Respond with ONLY a single number from 0 to 10."
-            )
-            response = self.query_llm(prompt)
-            scores.append(self._parse_score(response))
+        # Repeated passages are judged once and count once per occurrence.
+        first_seen = self._first_occurrences(contexts)
+        scores = {
+            context: self._query_score(self._precision_prompt(question, i, context))
+            for context, i in first_seen.items()
+        }
+        return sum(scores[context] for context in contexts) / len(contexts)
 
-        return sum(scores) / len(scores)
+    async def ascore_context_precision(
+        self, client: httpx.AsyncClient, question: str, contexts: List[str]
+    ) -> float:
+        """Async variant of score_context_precision; all passages are judged concurrently."""
+        if not contexts:
+            return 0.0
 
-    def score_context_recall(self, answer: str, contexts: List[str]) -> float:
+        first_seen = self._first_occurrences(contexts)
+        unique_scores = await asyncio.gather(*(
+            self._aquery_score(client, self._precision_prompt(question, i, context))
+            for context, i in first_seen.items()
+        ))
+        scores = dict(zip(first_seen, unique_scores))
+        return sum(scores[context] for context in contexts) / len(contexts)
+
+    @staticmethod
+    def _first_occurrences(contexts: List[str]) -> Dict[str, int]:
+        """Map each distinct passage to the index of its first occurrence."""
+        first_seen: Dict[str, int] = {}
+        for i, context in enumerate(contexts):
+            first_seen.setdefault(context, i)
+        return first_seen
+
+    def _precision_prompt(self, question: str, i: int, context: str) -> str:
+        """Build the context precision judge prompt for passage *i*."""
+        return (
+            "You are an impartial judge evaluating whether a retrieved context passage "
+            "is relevant to answering a question.\n\n"
+            "Context precision measures whether the retrieved passage contains information "
+            "that would be useful for answering the question.\n\n"
+            f"QUESTION:\n{question}\n\n"
+            f"RETRIEVED CONTEXT (passage {i + 1}):\n{context}\n\n"
+            "Is this context passage relevant and useful for answering the question? "
+            "Rate the relevance on a scale of 0 to 10, where:\n"
+            "  0 = The passage is completely irrelevant to the question\n"
+            "  5 = The passage has some tangential relevance but is mostly unhelpful\n"
+            "  10 = The passage is highly relevant and directly useful for answering\n\n"
+            "Respond with ONLY a single number from 0 to 10."
+        )
+
+    def score_context_recall(
+        self, answer: str, contexts: List[str], numbered_contexts: Optional[str] = None
+    ) -> float:
         """
         Judge whether the contexts contain enough information to produce the answer.
 
@@ -209,6 +508,8 @@ class RAGEvaluator:
         Args:
             answer: The generated answer.
             contexts: List of retrieved context strings.
+            numbered_contexts: The contexts already joined by _number_contexts,
+                if the caller has them (saves joining them again).
 
         Returns:
             A float from 0.0 (contexts lack needed info) to 1.0 (contexts fully sufficient).
@@ -216,11 +517,32 @@ class RAGEvaluator:
         if not contexts:
             return 0.0
 
-        combined_context = "\n\n---\n\n".join(
-            f"[Context {i + 1}]: {ctx}" for i, ctx in enumerate(contexts)
+        return self._query_score(self._recall_prompt(answer, contexts, numbered_contexts))
+
+    async def ascore_context_recall(
+        self,
+        client: httpx.AsyncClient,
+        answer: str,
+        contexts: List[str],
+        numbered_contexts: Optional[str] = None,
+    ) -> float:
+        """Async variant of score_context_recall using the shared *client*."""
+        if not contexts:
+            return 0.0
+
+        return await self._aquery_score(
+            client, self._recall_prompt(answer, contexts, numbered_contexts)
         )
 
-        prompt = (
+    def _recall_prompt(
+        self, answer: str, contexts: List[str], numbered_contexts: Optional[str] = None
+    ) -> str:
+        """Build the context recall judge prompt over all *contexts*."""
+        if numbered_contexts is None:
+            numbered_contexts = _number_contexts(contexts)
+        combined_context = _trim(numbered_contexts)
+
+        return (
             "You are an impartial judge evaluating context recall for a RAG system.\n\n"
             "Context recall measures whether the retrieved context passages collectively contain "
             "enough information to produce the given answer. High recall means no important "
@@ -234,13 +556,16 @@ class RAGEvaluator:
             "  10 = The contexts contain all the information needed to fully produce the answer\n\n"
             "Respond with ONLY a single number from 0 to 10."
         )
-        response = self.query_llm(prompt)
-        return self._parse_score(response)
 
-    def evaluate(self, question: str, answer: str, contexts: List[str]) -> Dict:
+    async def aevaluate(self, question: str, answer: str, contexts: List[str]) -> Dict:
         """
         Run all four evaluation metrics on a single RAG result.
 
+        The four metrics, and every per-passage context precision judgment,
+        are requested concurrently over the evaluator's pooled HTTP client.  Ollama only
+        serves them in parallel up to its OLLAMA_NUM_PARALLEL setting; extra
+        requests queue on the server.
+
         Args:
             question: The original question.
             answer: The generated answer.
@@ -250,13 +575,153 @@ class RAGEvaluator:
             Dictionary with individual metric scores and an overall average score.
             Keys: faithfulness, answer_relevancy, context_precision, context_recall, overall.
         """
+        return await self._aevaluate_metrics(question, answer, contexts)
+
+    async def _aevaluate_metrics(
+        self,
+        question: str,
+        answer: str,
+        contexts: List[str],
+        numbered_contexts: Optional[str] = None,
+    ) -> Dict:
+        """aevaluate, reusing *numbered_contexts* when the caller already built it."""
         combined_context = "\n\n".join(contexts) if contexts else ""
 
-        faithfulness = self.score_faithfulness(answer, combined_context)
-        answer_relevancy = self.score_answer_relevancy(question, answer)
-        context_precision = self.score_context_precision(question, contexts)
-        context_recall = self.score_context_recall(answer, contexts)
+        client = self._async_client()
+        faithfulness, answer_relevancy, context_precision, context_recall = (
+            await asyncio.gather(
+                self.ascore_faithfulness(client, answer, combined_context),
+                self.ascore_answer_relevancy(client, question, answer),
+                self.ascore_context_precision(client, question, contexts),
+                self.ascore_context_recall(client, answer, contexts, numbered_contexts),
+            )
+        )
+
+        return self._score_dict(
+            faithfulness, answer_relevancy, context_precision, context_recall
+        )
 
+    def evaluate(self, question: str, answer: str, contexts: List[str]) -> Dict:
+        """
+        Blocking wrapper around :meth:`aevaluate`.
+
+        Must not be called from a running event loop; await aevaluate instead.
+        """
+        return self._run(self.aevaluate(question, answer, contexts))
+
+    async def aevaluate_fused(
+        self, question: str, answer: str, contexts: List[str]
+    ) -> Dict:
+        """
+        Run all four evaluation metrics with a single judge prompt.
+
+        The question, answer and numbered passages are sent once and the
+        judge returns every score as one JSON object, so the (often long)
+        context is processed once instead of once per metric and passage.
+        Falls back to the per-metric :meth:`aevaluate` when there are no
+        contexts or the reply is not a complete, valid score object.
+
+        Args:
+            question: The original question.
+            answer: The generated answer.
+            contexts: List of retrieved context strings used to generate the answer.
+
+        Returns:
+            The same score dictionary as :meth:`aevaluate`.
+        """
+        if not contexts:
+            return await self.aevaluate(question, answer, contexts)
+
+        # Labeled once, for the fused prompt and the recall prompt of a fallback
+        numbered_contexts = _number_contexts(contexts)
+        response = await self._aquery_llm(
+            self._async_client(),
+            self._fused_prompt(question, answer, contexts, numbered_contexts),
+        )
+        scores = self._parse_fused_scores(response, len(contexts))
+        if scores is None:
+            return await self._aevaluate_metrics(
+                question, answer, contexts, numbered_contexts
+            )
+        return self._score_dict(*scores)
+
+    def evaluate_fused(self, question: str, answer: str, contexts: List[str]) -> Dict:
+        """
+        Blocking wrapper around :meth:`aevaluate_fused`.
+
+        Must not be called from a running event loop; await aevaluate_fused instead.
+        """
+        return self._run(self.aevaluate_fused(question, answer, contexts))
+
+    def _fused_prompt(
+        self,
+        question: str,
+        answer: str,
+        contexts: List[str],
+        numbered_contexts: Optional[str] = None,
+    ) -> str:
+        """Build the single judge prompt scoring all four metrics."""
+        if numbered_contexts is None:
+            numbered_contexts = _number_contexts(contexts)
+        return (
+            "You are an impartial judge evaluating a retrieval-augmented answer.\n\n"
+            f"QUESTION:\n{question}\n\n"
+            f"RETRIEVED CONTEXTS:\n{numbered_contexts}\n\n"
+            f"ANSWER:\n{answer}\n\n"
+            "Rate each of the following on a scale of 0 to 10:\n"
+            "  faithfulness: is every claim in the answer supported by the contexts? "
+            "(0 = entirely fabricated, 10 = every claim directly supported)\n"
+            "  answer_relevancy: does the answer directly and completely address the question? "
+            "(0 = completely irrelevant, 10 = addresses exactly what was asked)\n"
+            "  context_precision: for EACH context in order, is it relevant and useful for "
+            "answering the question? (0 = irrelevant, 10 = highly relevant)\n"
+            "  context_recall: do the contexts together contain all the information needed "
+            "to produce the answer? (0 = none of it, 10 = all of it)\n\n"
+            "Respond with ONLY a JSON object in this format:\n"
+            '{"faithfulness": 0, "answer_relevancy": 0, '
+            f'"context_precision": [{", ".join(["0"] * len(contexts))}], '
+            '"context_recall": 0}'
+        )
+
+    @staticmethod
+    def _parse_fused_scores(response: str, n_contexts: int):
+        """
+        Parse the fused judge reply into normalized metric scores.
+
+        Args:
+            response: The raw text response from the judge model.
+            n_contexts: Number of passages that must have a precision score.
+
+        Returns:
+            A (faithfulness, answer_relevancy, context_precision, context_recall)
+            tuple of floats in 0.0-1.0, or None if the reply is unusable.
+        """
+        start, end = response.find("{"), response.rfind("}")
+        if start == -1 or end <= start:
+            return None
+        try:
+            data = orjson.loads(response[start:end + 1])
+            precision = data["context_precision"]
+            if not isinstance(precision, list) or len(precision) != n_contexts:
+                return None
+            values = [
+                data["faithfulness"],
+                data["answer_relevancy"],
+                sum(float(v) for v in precision) / n_contexts,
+                data["context_recall"],
+            ]
+            return tuple(max(0.0, min(1.0, float(v) / 10.0)) for v in values)
+        except (ValueError, TypeError, KeyError):
+            return None
+
+    @staticmethod
+    def _score_dict(
+        faithfulness: float,
+        answer_relevancy: float,
+        context_precision: float,
+        context_recall: float,
+    ) -> Dict:
+        """Assemble the rounded per-metric scores and their overall average."""
         overall = (faithfulness + answer_relevancy + context_precision + context_recall) / 4.0
 
         return {
@@ -283,7 +748,38 @@ class RAGEvaluator:
         Returns:
             List of dicts, each with keys: question, answer, source.
         """
-        prompt = (
+        prompt = self._qa_prompt(text, n_pairs)
+
+        # Not cached: repeated generation should be free to produce new pairs.
+        response = self._post_llm(prompt)
+        return self._parse_qa_pairs(response, source, n_pairs)
+
+    async def agenerate_qa_pairs(
+        self, text: str, source: str, n_pairs: int = 3, limiter=None
+    ) -> List[Dict]:
+        """
+        Async variant of generate_qa_pairs over the pooled client, so Q&A
+        generation for several documents can overlap.
+
+        Args:
+            text, source, n_pairs: As for generate_qa_pairs.
+            limiter: Optional asyncio.Semaphore bounding concurrent LLM
+                     calls; held only while the request is in flight.
+
+        Returns:
+            List of dicts, each with keys: question, answer, source.
+        """
+        prompt = self._qa_prompt(text, n_pairs)
+
+        # Not cached, as in generate_qa_pairs.
+        async with limiter or contextlib.nullcontext():
+            response = await self._apost_llm(self._async_client(), prompt)
+        return self._parse_qa_pairs(response, source, n_pairs)
+
+    @staticmethod
+    def _qa_prompt(text: str, n_pairs: int) -> str:
+        """Build the Q&A generation prompt for *text*."""
+        return (
             "You are a research assistant creating evaluation data for a question-answering system.\n\n"
             f"Given the following text from a research paper, generate exactly {n_pairs} "
             "factual question-answer pairs. Each question should be answerable ONLY from "
@@ -297,15 +793,16 @@ class RAGEvaluator:
             "Respond with ONLY the JSON array, no other text."
         )
 
-        response = self.query_llm(prompt)
-
+    @staticmethod
+    def _parse_qa_pairs(response: str, source: str, n_pairs: int) -> List[Dict]:
+        """Extract up to *n_pairs* Q&A pairs from a generation *response*."""
         # Try to parse the JSON response.
         qa_pairs = []
         try:
             # Find JSON array in the response (the model may add extra text).
-            json_match = re.search(r"\[.*\]", response, re.DOTALL)
+            json_match = _RE_JSON_ARRAY.search(response)
             if json_match:
-                parsed = json.loads(json_match.group())
+                parsed = orjson.loads(json_match.group())
                 if isinstance(parsed, list):
                     for item in parsed:
                         if isinstance(item, dict) and "question" in item and "answer" in item:
@@ -316,21 +813,26 @@ class RAGEvaluator:
                                     "source": source,
                                 }
                             )
-        except (json.JSONDecodeError, AttributeError):
+        except (orjson.JSONDecodeError, AttributeError):
             pass
 
-        # If JSON parsing failed or returned too few pairs, try line-by-line extraction.
-        if len(qa_pairs) < n_pairs:
-            lines = response.strip().split("\n")
-            current_q = None
-            for line in lines:
-                line = line.strip()
-                q_match = re.match(r"(?:Q\d*[:.]|Question\s*\d*[:.])?\s*(.+\?)", line, re.IGNORECASE)
-                a_match = re.match(r"(?:A\d*[:.]|Answer\s*\d*[:.])?\s*(.+)", line, re.IGNORECASE)
-
-                if q_match and line.endswith("?"):
+        # JSON parsing usually succeeds; the line scan is only a fallback.
+        if len(qa_pairs) >= n_pairs:
+            return qa_pairs[:n_pairs]
+
+        # Too few pairs: try line-by-line extraction.  A line can only be a
+        # question if it ends with "?" and an answer if it does not, so each
+        # line is matched against at most one pattern.
+        current_q = None
+        for line in response.split("\n"):
+            line = line.strip()
+            if line.endswith("?"):
+                q_match = _RE_QUESTION.match(line)
+                if q_match:
                     current_q = q_match.group(1).strip()
-                elif a_match and current_q and not line.endswith("?"):
+            elif current_q:
+                a_match = _RE_ANSWER.match(line)
+                if a_match:
                     qa_pairs.append(
                         {
                             "question": current_q,
@@ -339,56 +841,53 @@ class RAGEvaluator:
                         }
                     )
                     current_q = None
-
-                if len(qa_pairs) >= n_pairs:
-                    break
+                    if len(qa_pairs) >= n_pairs:
+                        break
 
         return qa_pairs[:n_pairs]
 
-    def run_evaluation_suite(
-        self, rag_pipeline, qa_pairs: List[Dict]
+    async def arun_evaluation_suite(
+        self, rag_pipeline, qa_pairs: List[Dict], max_concurrency: int = 4
     ) -> Dict:
         """
         Run a full evaluation suite over a list of Q&A pairs using the RAG pipeline.
 
         For each Q&A pair, queries the pipeline, evaluates the result, and
-        computes aggregate scores across all pairs.
+        computes aggregate scores across all pairs.  Up to *max_concurrency*
+        pairs are processed at once (match it to Ollama's OLLAMA_NUM_PARALLEL),
+        with the blocking rag_query call run in a worker thread.
 
         Args:
             rag_pipeline: An object with a `rag_query(question)` method that returns
                           a dict with keys: answer, sources (list of dicts with 'text').
             qa_pairs: List of dicts with keys: question, answer, source.
+            max_concurrency: Maximum number of pairs evaluated at the same time.
 
         Returns:
-            Dictionary with per-pair results and aggregate metric averages.
-        """
-        results = []
-        aggregate = {
-            "faithfulness": [],
-            "answer_relevancy": [],
-            "context_precision": [],
-            "context_recall": [],
-            "overall": [],
-        }
+            Dictionary with per-pair results (in input order) and aggregate
+            metric averages.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
 
-        for i, qa_pair in enumerate(qa_pairs):
+        async def evaluate_pair(i: int, qa_pair: Dict) -> Dict:
             question = qa_pair["question"]
             expected_answer = qa_pair.get("answer", "")
 
-            # Run the RAG pipeline to get an answer.
-            try:
-                pipeline_result = rag_pipeline.rag_query(question)
-                generated_answer = pipeline_result.get("answer", "")
-                sources = pipeline_result.get("sources", [])
-                contexts = [s.get("text", "") for s in sources if isinstance(s, dict)]
-            except Exception as e:
-                generated_answer = f"Pipeline error: {str(e)}"
-                contexts = []
-
-            # Evaluate the result.
-            scores = self.evaluate(question, generated_answer, contexts)
-
-            result_entry = {
+            async with semaphore:
+                # Run the RAG pipeline to get an answer.
+                try:
+                    pipeline_result = await asyncio.to_thread(rag_pipeline.rag_query, question)
+                    generated_answer = pipeline_result.get("answer", "")
+                    sources = pipeline_result.get("sources", [])
+                    contexts = [s.get("text", "") for s in sources if isinstance(s, dict)]
+                except Exception as e:
+                    generated_answer = f"Pipeline error: {str(e)}"
+                    contexts = []
+
+                # Evaluate the result.
+                scores = await self.aevaluate(question, generated_answer, contexts)
+
+            return {
                 "pair_index": i,
                 "question": question,
                 "expected_answer": expected_answer,
@@ -396,17 +895,26 @@ class RAGEvaluator:
                 "num_contexts": len(contexts),
                 "scores": scores,
             }
-            results.append(result_entry)
 
-            # Accumulate for aggregation.
-            for metric in aggregate:
-                aggregate[metric].append(scores[metric])
+        results = await asyncio.gather(
+            *(evaluate_pair(i, qa_pair) for i, qa_pair in enumerate(qa_pairs))
+        )
+
+        info = self.cache_info()
+        print(
+            f"[Eval] Judge cache: {info['hits']} hits / {info['misses']} misses "
+            f"(hit rate {info['hit_rate']:.1%}, {info['size']} entries)"
+        )
 
-        # Compute aggregate averages.
-        num_pairs = len(qa_pairs) if qa_pairs else 1
+        # Compute aggregate averages: one row per pair, one column per metric.
+        metrics = ("faithfulness", "answer_relevancy", "context_precision", "context_recall", "overall")
+        scores_matrix = np.array(
+            [[r["scores"][metric] for metric in metrics] for r in results],
+            dtype=np.float64,
+        ).reshape(len(results), len(metrics))
+        means = scores_matrix.mean(axis=0) if results else np.zeros(len(metrics))
         aggregate_scores = {
-            metric: round(sum(values) / max(len(values), 1), 4)
-            for metric, values in aggregate.items()
+            metric: round(float(mean), 4) for metric, mean in zip(metrics, means)
         }
 
         return {
@@ -414,3 +922,15 @@ class RAGEvaluator:
             "aggregate_scores": aggregate_scores,
             "per_pair_results": results,
         }
+
+    def run_evaluation_suite(
+        self, rag_pipeline, qa_pairs: List[Dict], max_concurrency: int = 4
+    ) -> Dict:
+        """
+        Blocking wrapper around :meth:`arun_evaluation_suite`.
+
+        Must not be called from a running event loop; await arun_evaluation_suite instead.
+        """
+        return self._run(
+            self.arun_evaluation_suite(rag_pipeline, qa_pairs, max_concurrency)
+        )
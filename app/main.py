@@ -2,11 +2,18 @@
 FastAPI Server for ArXivMind RAG Pipeline
 Enhanced with research agents, RAGAS evaluation, and paper management.
 """
+import asyncio
+import math
 import os
+import shutil
 import threading
+from collections import OrderedDict
 from pathlib import Path
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import BackgroundTasks, FastAPI, HTTPException, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+import orjson
+import requests
 import uvicorn
 from app.rag import get_rag
 from app.agents import ResearchAgents
@@ -20,7 +27,8 @@ from app.models import (
 app = FastAPI(
     title="ArXivMind API",
     description="Local RAG system for research paper Q&A with hybrid retrieval",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware for frontend
@@ -37,6 +45,9 @@ rag_pipeline = None
 research_agents = None
 evaluator = None
 
+# Keep-alive session for the Ollama health probe
+_health_session = requests.Session()
+
 # Indexing progress state
 indexing_status = {
     "state": "idle",
@@ -47,6 +58,26 @@ indexing_status = {
     "error": None,
 }
 
+# Per-file state of uploads indexed in the background (see /upload/status),
+# kept in LRU order and capped so it does not grow with every upload
+UPLOAD_STATUS_SIZE = 256
+upload_status: "OrderedDict[str, dict]" = OrderedDict()
+_upload_status_lock = threading.Lock()
+
+# (event loop, queue) of each open /index/stream connection
+_index_subscribers = set()
+
+
+def _publish_indexing_status():
+    """Push a snapshot of indexing_status to every /index/stream client.
+
+    Called from the indexing thread, so each queue is fed through its
+    loop's call_soon_threadsafe rather than touched directly.
+    """
+    snapshot = dict(indexing_status)
+    for loop, queue in list(_index_subscribers):
+        loop.call_soon_threadsafe(queue.put_nowait, snapshot)
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize RAG pipeline on server start"""
@@ -66,6 +97,17 @@ async def startup_event():
     print(f"API docs at http://localhost:8000/docs")
     print("="*50 + "\n")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled HTTP connections"""
+    _health_session.close()
+    if rag_pipeline:
+        rag_pipeline.session.close()
+        await rag_pipeline.aclose()
+    if evaluator:
+        evaluator.close()
+        await evaluator.aclose()
+
 @app.get("/")
 async def root():
     """Root endpoint - welcome message"""
@@ -88,12 +130,11 @@ async def root():
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint"""
-    import requests as req
     ollama_url = os.environ.get("OLLAMA_HOST", "http://host.docker.internal:11434")
     model_name = os.environ.get("MODEL_NAME", "glm-4.7-flash")
     ollama_connected = False
     try:
-        r = req.get(f"{ollama_url}/api/tags", timeout=3)
+        r = _health_session.get(f"{ollama_url}/api/tags", timeout=3)
         ollama_connected = r.status_code == 200
     except Exception:
         pass
@@ -116,8 +157,10 @@ def _run_indexing():
                 "total_papers": total_papers,
                 "total_chunks": total_chunks,
             })
+            _publish_indexing_status()
 
         result = rag_pipeline.index_papers(progress_callback=on_progress)
+        research_agents.clear_cache()
 
         if "error" in result:
             indexing_status["state"] = "error"
@@ -128,6 +171,7 @@ def _run_indexing():
     except Exception as e:
         indexing_status["state"] = "error"
         indexing_status["error"] = str(e)
+    _publish_indexing_status()
 
 
 @app.post("/index")
@@ -149,15 +193,47 @@ async def index_papers():
         "error": None,
     }
 
+    _publish_indexing_status()
+
     thread = threading.Thread(target=_run_indexing, daemon=True)
     thread.start()
 
-    return {"status": "started", "message": "Indexing started in background. Poll GET /index/status for progress."}
+    return {"status": "started", "message": "Indexing started in background. Follow GET /index/stream for progress."}
+
+
+@app.get("/index/stream")
+async def index_stream():
+    """Stream indexing progress as server-sent events
+
+    Sends the current status, then one event per progress update, and
+    closes once indexing is no longer running.
+    """
+    queue = asyncio.Queue()
+    subscriber = (asyncio.get_running_loop(), queue)
+
+    async def events():
+        # Subscribe before the first snapshot so no update falls in between
+        _index_subscribers.add(subscriber)
+        try:
+            status = dict(indexing_status)
+            while True:
+                yield b"data: " + orjson.dumps(status) + b"\n\n"
+                if status["state"] != "indexing":
+                    break
+                status = await queue.get()
+        finally:
+            _index_subscribers.discard(subscriber)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
 
 
-@app.get("/index/status")
+@app.get("/index/status", deprecated=True)
 async def index_status():
-    """Get current indexing progress"""
+    """Get current indexing progress (deprecated: use /index/stream)"""
     return indexing_status
 
 @app.post("/query", response_model=QueryResponse)
@@ -173,7 +249,9 @@ async def query_papers(request: QueryRequest):
         )
 
     try:
-        result = rag_pipeline.rag_query(request.question, request.n_results)
+        result = await asyncio.to_thread(
+            rag_pipeline.rag_query, request.question, request.n_results
+        )
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
@@ -191,7 +269,7 @@ async def run_agent(request: AgentRequest):
         )
 
     try:
-        result = research_agents.run_agent(
+        result = await research_agents.arun_agent(
             request.agent_type, request.question, request.n_results
         )
         return result
@@ -214,12 +292,14 @@ async def evaluate_query(request: EvalRequest):
 
     try:
         # Run the RAG query
-        rag_result = rag_pipeline.rag_query(request.question, request.n_results)
+        rag_result = await asyncio.to_thread(
+            rag_pipeline.rag_query, request.question, request.n_results
+        )
         answer = rag_result.get("answer", "")
         contexts = [s.get("text", "") for s in rag_result.get("sources", [])]
 
         # Evaluate
-        scores = evaluator.evaluate(request.question, answer, contexts)
+        scores = await evaluator.aevaluate(request.question, answer, contexts)
 
         return {
             "question": request.question,
@@ -251,28 +331,68 @@ async def generate_qa_pairs():
         docs = all_data.get("documents", [])
         metadatas = all_data.get("metadatas", [])
 
-        qa_pairs = []
+        # One document per source
         seen_sources = set()
-
+        samples = []
         for i, doc in enumerate(docs):
             source = metadatas[i].get("source", "unknown") if i < len(metadatas) else "unknown"
             if source in seen_sources:
                 continue
             seen_sources.add(source)
+            samples.append((doc, source))
+
+        # Generate in waves of just enough documents to fill the remaining
+        # pairs, each wave concurrently up to the number of requests Ollama
+        # serves in parallel; a short wave is topped up from the next docs
+        max_pairs, pairs_per_doc = 10, 2
+        limiter = asyncio.Semaphore(int(os.environ.get("OLLAMA_NUM_PARALLEL", "4")))
+        qa_pairs = []
+        while samples and len(qa_pairs) < max_pairs:
+            n_docs = math.ceil((max_pairs - len(qa_pairs)) / pairs_per_doc)
+            wave, samples = samples[:n_docs], samples[n_docs:]
+            results = await asyncio.gather(*(
+                evaluator.agenerate_qa_pairs(doc, source, n_pairs=pairs_per_doc, limiter=limiter)
+                for doc, source in wave
+            ))
+            qa_pairs.extend(pair for pairs in results for pair in pairs)
+
+        return {"qa_pairs": qa_pairs[:max_pairs], "count": min(len(qa_pairs), max_pairs)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Q&A generation failed: {str(e)}")
+
+def _save_upload(src, dest: Path):
+    """Stream an uploaded file object to *dest* without buffering it whole"""
+    with open(dest, "wb") as out:
+        shutil.copyfileobj(src, out, length=1024 * 1024)
 
-            pairs = evaluator.generate_qa_pairs(doc, source, n_pairs=2)
-            qa_pairs.extend(pairs)
 
-            if len(qa_pairs) >= 10:
-                break
+def _set_upload_status(filename: str, status: dict):
+    """Record *status* for *filename*, evicting the oldest entries past the cap"""
+    with _upload_status_lock:
+        upload_status[filename] = status
+        upload_status.move_to_end(filename)
+        while len(upload_status) > UPLOAD_STATUS_SIZE:
+            upload_status.popitem(last=False)
 
-        return {"qa_pairs": qa_pairs[:10], "count": min(len(qa_pairs), 10)}
+
+def _index_upload(save_path: Path):
+    """Background task: index an uploaded paper and record the outcome"""
+    filename = save_path.name
+    _set_upload_status(filename, {"status": "indexing", "filename": filename})
+    try:
+        _set_upload_status(filename, rag_pipeline.index_single_paper(save_path))
+        research_agents.clear_cache()
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Q&A generation failed: {str(e)}")
+        _set_upload_status(filename, {
+            "status": "error",
+            "filename": filename,
+            "error": f"Indexing failed: {str(e)}",
+        })
+
 
 @app.post("/upload", response_model=UploadResponse)
-async def upload_paper(file: UploadFile = File(...)):
-    """Upload and index a single PDF paper"""
+async def upload_paper(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+    """Upload a single PDF paper and queue it for indexing"""
     if not file.filename or not file.filename.endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are accepted")
     if not rag_pipeline:
@@ -282,15 +402,24 @@ async def upload_paper(file: UploadFile = File(...)):
     papers_dir.mkdir(parents=True, exist_ok=True)
     save_path = papers_dir / file.filename
 
-    content = await file.read()
-    with open(save_path, "wb") as f:
-        f.write(content)
+    # Copy the spooled upload to disk in 1 MiB pieces, off the event loop
+    await asyncio.to_thread(_save_upload, file.file, save_path)
 
-    try:
-        result = rag_pipeline.index_single_paper(save_path)
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Indexing failed: {str(e)}")
+    # Index after the response is sent; poll GET /upload/status/{filename}
+    status = {"status": "queued", "filename": file.filename}
+    _set_upload_status(file.filename, status)
+    background_tasks.add_task(_index_upload, save_path)
+    return status
+
+
+@app.get("/upload/status/{filename}", response_model=UploadResponse)
+async def upload_status_check(filename: str):
+    """Get the indexing state of an uploaded paper"""
+    with _upload_status_lock:
+        status = upload_status.get(filename)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return status
 
 
 @app.get("/papers", response_model=PapersListResponse)
@@ -308,6 +437,7 @@ async def delete_paper(paper_id: str):
     if not rag_pipeline:
         raise HTTPException(status_code=500, detail="RAG pipeline not initialized")
     result = rag_pipeline.delete_paper(paper_id)
+    research_agents.clear_cache()
     if result.get("status") == "not_found":
         raise HTTPException(status_code=404, detail="Paper not found")
     return result
@@ -336,9 +466,14 @@ async def get_stats():
     }
 
 if __name__ == "__main__":
+    # uvloop and httptools come with uvicorn[standard].  Indexing and
+    # upload state live in this process, so more than one worker only
+    # suits query traffic.
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.environ.get("WORKERS", "1")),
     )
@@ -1,59 +1,176 @@
 """
 Paper Manifest Manager for ArXivMind
 
-Tracks indexed papers with SHA-256 hashes for deduplication,
+Tracks indexed papers with BLAKE3 content hashes for deduplication,
 metadata (title, page count, chunk count), and indexing timestamps.
 """
+import atexit
 import json
 import hashlib
+import mmap
+import os
+import threading
 from pathlib import Path
 from datetime import datetime, timezone
 from typing import Dict, List, Optional
+from blake3 import blake3
 
 MANIFEST_PATH = Path("/app/data/manifest.json")
+HASH_ALGO = "blake3"  # Algorithm of newly recorded hashes
+HASH_SLICE = 64 << 20  # Bytes hashed per update() call for SHA-256
 
 
 class ManifestManager:
     def __init__(self, manifest_path: Path = MANIFEST_PATH):
         self.manifest_path = manifest_path
         self._data: Dict = self._load()
+        # Papers may be checked from several threads (see needs_reindex)
+        self._lock = threading.RLock()
+        # Inside a `with manifest:` batch, changes are only marked dirty and
+        # written once when the outermost batch exits
+        self._batch_depth = 0
+        self._dirty = False
+        atexit.register(self.flush)
 
     def _load(self) -> Dict:
         if self.manifest_path.exists():
             with open(self.manifest_path) as f:
-                return json.load(f)
+                data = json.load(f)
+            # Manifests written before hashes were tagged with their
+            # algorithm hold a bare "sha256" field
+            for entry in data["papers"].values():
+                if "sha256" in entry:
+                    entry["hash"] = entry.pop("sha256")
+                    entry["algo"] = "sha256"
+            return data
         return {"papers": {}}
 
     def _save(self):
-        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.manifest_path, "w") as f:
-            json.dump(self._data, f, indent=2)
+        with self._lock:
+            self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            # Write a sibling file and swap it in, so a crash mid-write never
+            # leaves a truncated manifest behind
+            tmp_path = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self._data, f, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+            self._dirty = False
+
+    def _changed(self):
+        """Persist a change now, or when the enclosing batch ends."""
+        with self._lock:
+            if self._batch_depth:
+                self._dirty = True
+            else:
+                self._save()
+
+    def flush(self):
+        """Write out changes deferred by a batch, if any."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def __enter__(self):
+        with self._lock:
+            self._batch_depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        with self._lock:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.flush()
+        return False
 
     @staticmethod
-    def compute_hash(path: Path) -> str:
+    def compute_hash(path: Path, algo: str = HASH_ALGO) -> str:
+        if algo == "blake3":
+            # BLAKE3 only fingerprints files for deduplication, so it need
+            # not be SHA-256.  It hashes the memory-mapped file with SIMD and
+            # tree parallelism across all cores, with the GIL released.
+            h = blake3(max_threads=blake3.AUTO)
+            h.update_mmap(path)
+            return h.hexdigest()
+
+        # Legacy SHA-256, kept to verify entries recorded before BLAKE3.
+        # The file is memory-mapped and hashed one 64 MiB slice at a time.
         h = hashlib.sha256()
         with open(path, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                h.update(chunk)
+            size = os.fstat(f.fileno()).st_size
+            if size:  # an empty file cannot be mapped
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                    for start in range(0, size, HASH_SLICE):
+                        h.update(view[start:start + HASH_SLICE])
         return h.hexdigest()
 
-    def is_indexed(self, filename: str, sha256: str) -> bool:
+    def is_indexed(self, filename: str, file_hash: str, algo: str = HASH_ALGO) -> bool:
         entry = self._data["papers"].get(filename)
-        return entry is not None and entry.get("sha256") == sha256
+        return entry is not None and entry.get("algo") == algo and entry.get("hash") == file_hash
+
+    def needs_reindex(self, path: Path, stat: Optional[os.stat_result] = None) -> Optional[str]:
+        """Return the BLAKE3 hash of *path* if it must be (re)indexed, else None.
+
+        A file whose size and mtime match the manifest entry is taken as
+        unchanged without being read.  Otherwise it is hashed and compared,
+        and if only its mtime moved the stored size/mtime are refreshed.
+        Entries still holding a SHA-256 are checked with SHA-256 and, when
+        the file is unchanged, re-recorded with its BLAKE3 hash.
+        Safe to call for different files from several threads.
+        """
+        stat = stat or path.stat()
+        entry = self._data["papers"].get(path.name)
+        if (
+            entry is not None
+            and entry.get("size") == stat.st_size
+            and entry.get("mtime_ns") == stat.st_mtime_ns
+        ):
+            return None
+
+        if entry is None:
+            return self.compute_hash(path)
+        algo = entry.get("algo", HASH_ALGO)
+        file_hash = self.compute_hash(path, algo)
+        if entry.get("hash") != file_hash:
+            return file_hash if algo == HASH_ALGO else self.compute_hash(path)
+        if algo != HASH_ALGO:
+            file_hash = self.compute_hash(path)
+        with self._lock:
+            entry["hash"] = file_hash
+            entry["algo"] = HASH_ALGO
+            entry["size"] = stat.st_size
+            entry["mtime_ns"] = stat.st_mtime_ns
+            self._changed()
+        return None
 
-    def add_paper(self, filename: str, title: str, page_count: int, chunk_count: int, sha256: str):
-        self._data["papers"][filename] = {
+    def add_paper(
+        self,
+        filename: str,
+        title: str,
+        page_count: int,
+        chunk_count: int,
+        file_hash: str,
+        stat: Optional[os.stat_result] = None,
+    ):
+        entry = {
             "title": title,
             "page_count": page_count,
             "chunk_count": chunk_count,
-            "sha256": sha256,
+            "hash": file_hash,
+            "algo": HASH_ALGO,
             "indexed_at": datetime.now(timezone.utc).isoformat(),
         }
-        self._save()
+        if stat is not None:
+            # Lets needs_reindex skip hashing the file while it is unchanged
+            entry["size"] = stat.st_size
+            entry["mtime_ns"] = stat.st_mtime_ns
+        with self._lock:
+            self._data["papers"][filename] = entry
+            self._changed()
 
     def remove_paper(self, filename: str):
-        self._data["papers"].pop(filename, None)
-        self._save()
+        with self._lock:
+            self._data["papers"].pop(filename, None)
+            self._changed()
 
     def get_papers(self) -> List[Dict]:
         return [
@@ -10,10 +10,14 @@ import re
 from pathlib import Path
 import fitz  # pymupdf
 
+# arXiv IDs such as 2301.12345 or 2301.12345v2
+_ARXIV_RE = re.compile(r"\d{4}\.\d{4,5}(?:v\d+)?")
+_WS_RE = re.compile(r"\s+")
+
 
 def _is_arxiv_id(text: str) -> bool:
     """Check if text looks like an arXiv ID (e.g., 2301.12345, 2301.12345v2)."""
-    return bool(re.fullmatch(r"\d{4}\.\d{4,5}(?:v\d+)?", text.strip()))
+    return _ARXIV_RE.fullmatch(text.strip()) is not None
 
 
 def _is_filename_like(title: str, pdf_path: Path) -> bool:
@@ -30,12 +34,10 @@ def _is_filename_like(title: str, pdf_path: Path) -> bool:
     return False
 
 
-def _title_from_metadata(pdf_path: Path) -> str | None:
+def _title_from_metadata(doc: fitz.Document, pdf_path: Path) -> str | None:
     """Strategy 1: Extract title from PDF metadata field."""
     try:
-        doc = fitz.open(str(pdf_path))
         metadata = doc.metadata
-        doc.close()
         if metadata and metadata.get("title"):
             title = metadata["title"].strip()
             if not title:
@@ -50,30 +52,27 @@ def _title_from_metadata(pdf_path: Path) -> str | None:
     return None
 
 
-def _title_from_largest_font(pdf_path: Path) -> str | None:
+def _title_from_largest_font(doc: fitz.Document) -> str | None:
     """Strategy 2: Extract title from first-page largest-font text."""
     try:
-        doc = fitz.open(str(pdf_path))
         if len(doc) == 0:
-            doc.close()
             return None
         page = doc[0]
         text_dict = page.get_text("dict")
-        doc.close()
 
-        max_size = 0.0
+        spans = (
+            span
+            for block in text_dict.get("blocks", [])
+            if block.get("type") == 0  # type 0 = text block
+            for line in block.get("lines", [])
+            for span in line.get("spans", [])
+            if span.get("text", "").strip()
+        )
+        # max() keeps the first of equally large spans
+        best = max(spans, key=lambda s: s.get("size", 0), default=None)
         max_text = ""
-
-        for block in text_dict.get("blocks", []):
-            if block.get("type") != 0:  # type 0 = text block
-                continue
-            for line in block.get("lines", []):
-                for span in line.get("spans", []):
-                    size = span.get("size", 0)
-                    text = span.get("text", "").strip()
-                    if text and size > max_size:
-                        max_size = size
-                        max_text = text
+        if best is not None and best.get("size", 0) > 0:
+            max_text = best["text"].strip()
 
         if max_text:
             # Clean up and limit length
@@ -89,11 +88,11 @@ def _title_from_filename(pdf_path: Path) -> str:
     """Strategy 3: Clean filename as fallback title."""
     name = pdf_path.stem
     # Strip arXiv ID patterns (e.g., 2301.12345v2, 2301.12345)
-    name = re.sub(r"\d{4}\.\d{4,5}(?:v\d+)?", "", name)
+    name = _ARXIV_RE.sub("", name)
     # Replace underscores and hyphens with spaces
     name = name.replace("_", " ").replace("-", " ")
     # Collapse multiple spaces
-    name = re.sub(r"\s+", " ", name).strip()
+    name = _WS_RE.sub(" ", name).strip()
     # Title-case
     if name:
         name = name.title()
@@ -102,7 +101,7 @@ def _title_from_filename(pdf_path: Path) -> str:
     return name
 
 
-def extract_title(pdf_path: Path) -> str:
+def extract_title(pdf_path: Path, doc: fitz.Document | None = None) -> str:
     """Extract paper title using a 3-strategy cascade.
 
     1. PDF metadata title field (reject if empty, filename-like, or arXiv ID)
@@ -111,17 +110,26 @@ def extract_title(pdf_path: Path) -> str:
 
     Args:
         pdf_path: Path to the PDF file.
+        doc: The PDF already opened with PyMuPDF, if the caller has it;
+            otherwise it is opened (and closed) here.
 
     Returns:
         Extracted title string.
     """
+    if doc is None:
+        try:
+            with fitz.open(str(pdf_path)) as doc:
+                return extract_title(pdf_path, doc)
+        except Exception:
+            return _title_from_filename(pdf_path)
+
     # Strategy 1: PDF metadata
-    title = _title_from_metadata(pdf_path)
+    title = _title_from_metadata(doc, pdf_path)
     if title:
         return title
 
     # Strategy 2: Largest font on first page
-    title = _title_from_largest_font(pdf_path)
+    title = _title_from_largest_font(doc)
     if title:
         return title
 
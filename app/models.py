@@ -50,7 +50,8 @@ class PaperInfo(BaseModel):
     title: str
     page_count: int
     chunk_count: int
-    sha256: str
+    hash: str
+    algo: str
     indexed_at: str
 
 
@@ -62,6 +63,7 @@ class PapersListResponse(BaseModel):
 class UploadResponse(BaseModel):
     status: str
     filename: str
-    title: str
-    page_count: int
-    chunk_count: int
+    title: Optional[str] = None
+    page_count: Optional[int] = None
+    chunk_count: Optional[int] = None
+    error: Optional[str] = None
@@ -2,17 +2,23 @@
 RAG Pipeline: PDF Processing, Vector Search, and GLM-4 Integration
 Enhanced with section-aware chunking and hybrid retrieval.
 """
+import asyncio
+import contextlib
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict, Iterable, List
 import fitz  # pymupdf
 import chromadb
 from sentence_transformers import SentenceTransformer
 import requests
-import json
+from requests.adapters import HTTPAdapter
+import httpx
+import numpy as np
+import orjson
 
-from app.chunker import SectionChunker
+from app.chunker import Chunk, SectionChunker
 from app.retriever import HybridRetriever
 from app.manifest import ManifestManager
 from app.metadata import extract_title
@@ -22,15 +28,51 @@ PAPERS_DIR = Path("/app/papers")
 CHROMA_DIR = Path(os.environ.get("CHROMA_PERSIST_DIR", "/app/data"))
 MODEL_NAME = os.environ.get("MODEL_NAME", "glm-4.7-flash")
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"  # Fast, good quality embeddings
+# "torch" (default) or "onnx": the model's int8-quantized ONNX export, run by
+# ONNX Runtime (needs sentence-transformers[onnx]).  Quantized vectors differ
+# slightly from the FP32 ones, so re-index after switching.
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch")
+EMBEDDING_ONNX_FILE = os.environ.get("EMBEDDING_ONNX_FILE", "onnx/model_qint8_avx512_vnni.onnx")
 CHUNK_SIZE = 500  # Characters per chunk
 OLLAMA_URL = os.environ.get("OLLAMA_HOST", "http://host.docker.internal:11434")
+LLM_RETRIES = 3  # Attempts per async LLM call
+# How long Ollama keeps the model loaded after a request, so queries that
+# arrive within this window skip the model load
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "10m")
+# Context window sent with every request to the model.  Ollama reloads the
+# model whenever num_ctx changes, so app.evaluation sends the same setting.
+OLLAMA_NUM_CTX = int(os.environ.get("OLLAMA_NUM_CTX", "4096"))
+
+
+def _is_transient(exc: Exception) -> bool:
+    """Return True for LLM call failures worth retrying after a backoff."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(exc, httpx.TransportError)
+
 
 class RAGPipeline:
     def __init__(self):
         """Initialize RAG components"""
         # Initialize embedding model
-        print(f"Loading embedding model: {EMBEDDING_MODEL}")
-        self.embedder = SentenceTransformer(EMBEDDING_MODEL)
+        print(f"Loading embedding model: {EMBEDDING_MODEL} ({EMBEDDING_BACKEND} backend)")
+        if EMBEDDING_BACKEND == "onnx":
+            self.embedder = SentenceTransformer(
+                EMBEDDING_MODEL,
+                backend="onnx",
+                model_kwargs={"file_name": EMBEDDING_ONNX_FILE},
+            )
+        else:
+            self.embedder = SentenceTransformer(EMBEDDING_MODEL)
+
+        # SentenceTransformer already runs on CUDA when it is available.
+        # There, larger batches amortize kernel launches and FP16 weights
+        # use the tensor cores.
+        on_gpu = self.embedder.device.type == "cuda"
+        if on_gpu and EMBEDDING_BACKEND != "onnx":
+            self.embedder.half()
+        self.embed_batch_size = 256 if on_gpu else 64
 
         # Initialize ChromaDB
         print(f"Connecting to ChromaDB at: {CHROMA_DIR}")
@@ -40,6 +82,16 @@ class RAGPipeline:
             metadata={"description": "Research paper embeddings"}
         )
 
+        # Pooled keep-alive connections to Ollama; rag_query runs in
+        # worker threads, so the pool matches the evaluator's.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # Async counterpart for aquery_glm4, created per event loop
+        self._aclient = None
+        self._aclient_loop = None
+
         # Initialize manifest manager
         self.manifest = ManifestManager()
 
@@ -48,7 +100,9 @@ class RAGPipeline:
 
         # Initialize hybrid retriever
         print("Initializing hybrid retriever (BM25 + vector + reranking)...")
-        self.retriever = HybridRetriever(self.collection, self.embedder)
+        self.retriever = HybridRetriever(
+            self.collection, self.embedder, bm25_cache_path=CHROMA_DIR / "bm25_cache.pkl"
+        )
 
         # Build BM25 index if documents exist
         if self.collection.count() > 0:
@@ -56,20 +110,99 @@ class RAGPipeline:
             self.retriever.build_bm25_index()
             print(f"BM25 index built with {self.collection.count()} documents")
 
-    def extract_text_from_pdf(self, pdf_path: Path) -> tuple:
-        """Extract text from a single PDF file. Returns (text, page_count)."""
-        text = ""
+    def extract_text_from_pdf(self, pdf_path: Path, doc: fitz.Document | None = None) -> tuple:
+        """Extract text from a single PDF file. Returns (text, page_count).
+
+        Reads from *doc* if the PDF is already open, leaving it open.
+        """
+        # Pages are collected and joined once, rather than re-copying the
+        # growing text for every page
+        parts = []
         page_count = 0
         try:
-            doc = fitz.open(str(pdf_path))
+            owned = doc is None
+            if owned:
+                doc = fitz.open(str(pdf_path))
             page_count = len(doc)
             for page in doc:
-                text += page.get_text() + "\n"
-            doc.close()
-            print(f"  Extracted {len(text)} chars ({page_count} pages) from {pdf_path.name}")
+                parts.append(page.get_text("text", sort=False))
+                parts.append("\n")
+            if owned:
+                doc.close()
+            print(f"  Extracted {sum(map(len, parts))} chars ({page_count} pages) from {pdf_path.name}")
         except Exception as e:
             print(f"  Error reading {pdf_path.name}: {e}")
-        return text, page_count
+        return "".join(parts), page_count
+
+    def _extract_all(self, pdf_path: Path) -> tuple:
+        """Read a PDF's title and text from one open of the file.
+
+        Returns (title, text, page_count).
+        """
+        try:
+            doc = fitz.open(str(pdf_path))
+        except Exception as e:
+            print(f"  Error reading {pdf_path.name}: {e}")
+            return extract_title(pdf_path), "", 0
+        with doc:
+            title = extract_title(pdf_path, doc)
+            text, page_count = self.extract_text_from_pdf(pdf_path, doc)
+        return title, text, page_count
+
+    @staticmethod
+    def _chunk_columns(chunks: Iterable[Chunk], stem: str, title: str) -> tuple:
+        """Split *chunks* into the column lists ChromaDB's add() takes.
+
+        Builds documents, ids and metadatas in a single pass over the
+        chunks, which may be a lazy iterator. Returns (texts, ids, metadatas).
+        """
+        texts, ids, metadatas = [], [], []
+        for c in chunks:
+            texts.append(c.text)
+            ids.append(f"{stem}_chunk_{c.chunk_id}")
+            metadatas.append({
+                "source": c.source,
+                "chunk_id": c.chunk_id,
+                "section": c.section,
+                "title": title,
+            })
+        return texts, ids, metadatas
+
+    def _store_chunks(self, chunk_texts: List[str], ids: List[str], metadatas: List[Dict],
+                      log_progress: bool = False):
+        """Embed chunks and add them to ChromaDB one embedding batch at a time.
+
+        Each batch is stored as soon as it is embedded, so only one batch of
+        vectors is alive at once.  If a batch fails, the chunks this call
+        added are deleted again before the error propagates; IDs that were
+        already in the collection (a re-uploaded paper) are left alone.
+        """
+        BATCH_SIZE = self.embed_batch_size
+        added = []
+        try:
+            for batch_start in range(0, len(chunk_texts), BATCH_SIZE):
+                batch_end = batch_start + BATCH_SIZE
+                batch = chunk_texts[batch_start:batch_end]
+                batch_ids = ids[batch_start:batch_end]
+                existing = set(self.collection.get(ids=batch_ids, include=[])["ids"])
+                # Kept as a float32 NumPy array (Chroma accepts them) rather
+                # than lists of Python floats
+                embeddings = self.embedder.encode(
+                    batch, batch_size=BATCH_SIZE, convert_to_numpy=True, show_progress_bar=False
+                ).astype(np.float32, copy=False)
+                self.collection.add(
+                    embeddings=embeddings,
+                    documents=batch,
+                    ids=batch_ids,
+                    metadatas=metadatas[batch_start:batch_end]
+                )
+                added.extend(i for i in batch_ids if i not in existing)
+                if log_progress:
+                    print(f"  Embedded {min(batch_end, len(chunk_texts))}/{len(chunk_texts)} chunks")
+        except Exception:
+            if added:
+                self.collection.delete(ids=added)
+            raise
 
     def index_papers(self, progress_callback=None) -> Dict:
         """Process all PDFs in papers/ directory and store in ChromaDB"""
@@ -84,70 +217,51 @@ class RAGPipeline:
         total_chunks = 0
         papers_indexed = 0
 
-        for paper_idx, pdf_file in enumerate(pdf_files):
-            if progress_callback:
-                progress_callback(
-                    current_paper=pdf_file.name,
-                    papers_done=paper_idx,
-                    total_papers=len(pdf_files),
-                    total_chunks=total_chunks,
+        # Manifest updates are written once, when the batch ends
+        with self.manifest:
+            # Check the manifest for every paper up front, hashing only files
+            # whose size or mtime changed.  The hashers release the GIL, so the
+            # hashes are computed in parallel threads.
+            stats = [pdf_file.stat() for pdf_file in pdf_files]
+            with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor:
+                hashes = list(executor.map(self.manifest.needs_reindex, pdf_files, stats))
+
+            for paper_idx, (pdf_file, stat, file_hash) in enumerate(zip(pdf_files, stats, hashes)):
+                if progress_callback:
+                    progress_callback(
+                        current_paper=pdf_file.name,
+                        papers_done=paper_idx,
+                        total_papers=len(pdf_files),
+                        total_chunks=total_chunks,
+                    )
+
+                # Skip already-indexed papers
+                if file_hash is None:
+                    print(f"  Skipping {pdf_file.name} (already indexed, unchanged)")
+                    continue
+
+                # Extract title and text from a single open of the PDF
+                title, text, page_count = self._extract_all(pdf_file)
+                print(f"  Title: {title}")
+                if not text.strip():
+                    continue
+
+                # Section-aware chunking
+                chunk_texts, ids, metadatas = self._chunk_columns(
+                    self.chunker.iter_chunks(text, pdf_file.name), pdf_file.stem, title
                 )
+                print(f"  Created {len(chunk_texts)} section-aware chunks from {pdf_file.name}")
 
-            # Check manifest — skip already-indexed papers
-            sha256 = ManifestManager.compute_hash(pdf_file)
-            if self.manifest.is_indexed(pdf_file.name, sha256):
-                print(f"  Skipping {pdf_file.name} (already indexed, hash unchanged)")
-                continue
-
-            # Extract title
-            title = extract_title(pdf_file)
-            print(f"  Title: {title}")
-
-            # Extract text
-            text, page_count = self.extract_text_from_pdf(pdf_file)
-            if not text.strip():
-                continue
-
-            # Section-aware chunking
-            chunks = self.chunker.chunk_paper(text, pdf_file.name)
-            print(f"  Created {len(chunks)} section-aware chunks from {pdf_file.name}")
-
-            # Batched embedding with progress logging
-            chunk_texts = [c["text"] for c in chunks]
-            BATCH_SIZE = 64
-            all_embeddings = []
-            for batch_start in range(0, len(chunk_texts), BATCH_SIZE):
-                batch = chunk_texts[batch_start:batch_start + BATCH_SIZE]
-                batch_embeddings = self.embedder.encode(batch, show_progress_bar=False)
-                all_embeddings.extend(batch_embeddings.tolist())
-                print(f"  Embedded {min(batch_start + BATCH_SIZE, len(chunk_texts))}/{len(chunk_texts)} chunks")
-            embeddings = all_embeddings
-
-            # Store in ChromaDB with section metadata (including title)
-            ids = [f"{pdf_file.stem}_chunk_{c['chunk_id']}" for c in chunks]
-            metadatas = [
-                {
-                    "source": c["source"],
-                    "chunk_id": c["chunk_id"],
-                    "section": c.get("section", ""),
-                    "title": title,
-                }
-                for c in chunks
-            ]
-
-            self.collection.add(
-                embeddings=embeddings,
-                documents=chunk_texts,
-                ids=ids,
-                metadatas=metadatas
-            )
+                # Embed in batches and store each in ChromaDB with section
+                # metadata (including title) as it is ready
+                self._store_chunks(chunk_texts, ids, metadatas, log_progress=True)
 
-            chunk_count = len(chunks)
-            total_chunks += chunk_count
-            papers_indexed += 1
+                chunk_count = len(chunk_texts)
+                total_chunks += chunk_count
+                papers_indexed += 1
 
-            # Record in manifest
-            self.manifest.add_paper(pdf_file.name, title, page_count, chunk_count, sha256)
+                # Record in manifest
+                self.manifest.add_paper(pdf_file.name, title, page_count, chunk_count, file_hash, stat)
 
         if progress_callback:
             progress_callback(
@@ -168,27 +282,104 @@ class RAGPipeline:
             "collection_size": self.collection.count()
         }
 
+    def embed(self, text: str):
+        """Return the L2-normalized embedding of *text* as a NumPy vector."""
+        return self.embedder.encode(text, normalize_embeddings=True, show_progress_bar=False)
+
     def search_similar(self, query: str, n_results: int = 5) -> List[Dict]:
         """Search using hybrid retrieval (BM25 + vector + reranking)"""
         return self.retriever.search(query, n_results)
 
+    @staticmethod
+    def _generate_body(prompt: str) -> Dict:
+        """Build the Ollama /api/generate request body for *prompt*."""
+        return {
+            "model": MODEL_NAME,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
+            "options": {"num_ctx": OLLAMA_NUM_CTX},
+        }
+
     def query_glm4(self, prompt: str) -> str:
         """Send prompt to GLM-4 via Ollama with retry logic."""
         for attempt in range(3):
             try:
-                response = requests.post(
+                response = self.session.post(
                     f"{OLLAMA_URL}/api/generate",
-                    json={"model": MODEL_NAME, "prompt": prompt, "stream": False},
+                    json=self._generate_body(prompt),
                     timeout=60
                 )
                 response.raise_for_status()
-                return response.json().get("response", "No response from model")
+                return orjson.loads(response.content).get("response", "No response from model")
             except Exception as e:
                 if attempt < 2:
                     time.sleep(2 ** attempt)
                     continue
                 return f"Error calling GLM-4: {str(e)}"
 
+    async def asearch_similar(self, query: str, n_results: int = 5) -> List[Dict]:
+        """Async variant of search_similar; retrieval runs in a worker thread."""
+        return await asyncio.to_thread(self.search_similar, query, n_results)
+
+    async def aquery_glm4(self, prompt: str, limiter=None) -> str:
+        """Async variant of query_glm4 so independent LLM calls can overlap.
+
+        Transient failures (timeouts, connection errors, HTTP 429 and 5xx)
+        are retried with exponential backoff via asyncio.sleep, so other
+        in-flight calls keep running; anything else fails immediately.
+
+        Args:
+            prompt:  The prompt to send.
+            limiter: Optional asyncio.Semaphore bounding concurrent requests.
+                     It is held only while a request is in flight and
+                     released during backoff so waiting calls can proceed.
+        """
+        client = self._async_client()
+        for attempt in range(LLM_RETRIES):
+            try:
+                async with limiter or contextlib.nullcontext():
+                    response = await client.post(
+                        "/api/generate",
+                        json=self._generate_body(prompt),
+                    )
+                response.raise_for_status()
+                return orjson.loads(response.content).get("response", "No response from model")
+            except Exception as e:
+                if attempt < LLM_RETRIES - 1 and _is_transient(e):
+                    await asyncio.sleep(2 ** attempt)
+                    continue
+                return f"Error calling GLM-4: {str(e)}"
+
+    def _async_client(self) -> httpx.AsyncClient:
+        """
+        Return the pooled async client for the running event loop.
+
+        Concurrent agent calls and their retries share its keep-alive
+        connections.  Connections belong to the loop that opened them, so a
+        new client is created if the loop has changed.
+        """
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aclient_loop is not loop:
+            self._aclient = httpx.AsyncClient(
+                base_url=OLLAMA_URL,
+                timeout=httpx.Timeout(60.0),
+                limits=httpx.Limits(max_keepalive_connections=16, max_connections=16),
+            )
+            self._aclient_loop = loop
+        return self._aclient
+
+    async def aclose(self):
+        """Close the pooled async client, if it belongs to the running loop.
+
+        A client opened by another loop (a concurrent asyncio.run in a
+        worker thread, or the server's) is left to that loop.
+        """
+        if self._aclient is not None and self._aclient_loop is asyncio.get_running_loop():
+            await self._aclient.aclose()
+            self._aclient = None
+            self._aclient_loop = None
+
     def index_single_paper(self, pdf_path: Path) -> Dict:
         """Index a single PDF paper into the RAG pipeline.
 
@@ -198,53 +389,30 @@ class RAGPipeline:
         Returns:
             Dict with status, filename, title, page_count, chunk_count.
         """
-        sha256 = ManifestManager.compute_hash(pdf_path)
-        title = extract_title(pdf_path)
-        text, page_count = self.extract_text_from_pdf(pdf_path)
+        stat = pdf_path.stat()
+        file_hash = ManifestManager.compute_hash(pdf_path)
+        title, text, page_count = self._extract_all(pdf_path)
 
         if not text.strip():
             raise ValueError(f"No text could be extracted from {pdf_path.name}")
 
         # Section-aware chunking
-        chunks = self.chunker.chunk_paper(text, pdf_path.name)
-        print(f"  Created {len(chunks)} section-aware chunks from {pdf_path.name}")
-
-        # Embed
-        chunk_texts = [c["text"] for c in chunks]
-        BATCH_SIZE = 64
-        all_embeddings = []
-        for batch_start in range(0, len(chunk_texts), BATCH_SIZE):
-            batch = chunk_texts[batch_start:batch_start + BATCH_SIZE]
-            batch_embeddings = self.embedder.encode(batch, show_progress_bar=False)
-            all_embeddings.extend(batch_embeddings.tolist())
-
-        # Store in ChromaDB
-        ids = [f"{pdf_path.stem}_chunk_{c['chunk_id']}" for c in chunks]
-        metadatas = [
-            {
-                "source": c["source"],
-                "chunk_id": c["chunk_id"],
-                "section": c.get("section", ""),
-                "title": title,
-            }
-            for c in chunks
-        ]
-
-        self.collection.add(
-            embeddings=all_embeddings,
-            documents=chunk_texts,
-            ids=ids,
-            metadatas=metadatas
+        chunk_texts, ids, metadatas = self._chunk_columns(
+            self.chunker.iter_chunks(text, pdf_path.name), pdf_path.stem, title
         )
+        print(f"  Created {len(chunk_texts)} section-aware chunks from {pdf_path.name}")
 
-        chunk_count = len(chunks)
+        # Embed and store in ChromaDB, batch by batch
+        self._store_chunks(chunk_texts, ids, metadatas)
+
+        chunk_count = len(chunk_texts)
 
         # Update manifest
-        self.manifest.add_paper(pdf_path.name, title, page_count, chunk_count, sha256)
+        self.manifest.add_paper(pdf_path.name, title, page_count, chunk_count, file_hash, stat)
 
-        # Rebuild BM25 index
-        print("Rebuilding BM25 index...")
-        self.retriever.build_bm25_index()
+        # Add the new chunks to the BM25 index
+        print("Updating BM25 index...")
+        self.retriever.add_documents_to_bm25(ids, chunk_texts, metadatas)
 
         return {
             "status": "success",
@@ -268,15 +436,14 @@ class RAGPipeline:
         if not paper:
             return {"status": "not_found", "filename": filename}
 
-        # Get chunk IDs matching this paper from ChromaDB
-        stem = Path(filename).stem
-        prefix = f"{stem}_chunk_"
         chunks_removed = 0
+        matching_ids = []
 
-        # Retrieve all IDs from the collection and filter
+        # Every chunk carries its PDF's filename as "source" metadata, so
+        # Chroma can select the paper's chunks itself instead of us
+        # scanning every ID in the collection.
         try:
-            all_data = self.collection.get(include=[])
-            matching_ids = [id_ for id_ in all_data["ids"] if id_.startswith(prefix)]
+            matching_ids = self.collection.get(where={"source": filename}, include=[])["ids"]
 
             if matching_ids:
                 self.collection.delete(ids=matching_ids)
@@ -288,9 +455,9 @@ class RAGPipeline:
         # Remove from manifest
         self.manifest.remove_paper(filename)
 
-        # Rebuild BM25 index
-        print("Rebuilding BM25 index...")
-        self.retriever.build_bm25_index()
+        # Drop the paper's chunks from the BM25 index
+        print("Updating BM25 index...")
+        self.retriever.remove_documents_from_bm25(matching_ids)
 
         return {
             "status": "deleted",
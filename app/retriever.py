@@ -6,10 +6,110 @@ merges results via Reciprocal Rank Fusion (RRF), and reranks the top
 candidates using a cross-encoder model for maximum relevance.
 """
 
-from typing import List, Dict
-from rank_bm25 import BM25Okapi
+import heapq
+import math
+import os
+import pickle
+import re
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Dict, Optional
+import numpy as np
 from sentence_transformers import CrossEncoder
 
+# Bump when _tokenize changes, so stale on-disk tokenizations are ignored
+BM25_CACHE_VERSION = 2
+
+_WORD = re.compile(r"\w+")
+# Maps every ASCII character that \w does not match to a space
+_ASCII_NON_WORD = str.maketrans(
+    {c: " " for c in map(chr, range(128)) if not (c.isalnum() or c == "_")}
+)
+
+
+def _tokenize(text: str) -> List[str]:
+    """
+    Tokenize *text* for BM25: lowercased runs of word characters.
+
+    Punctuation is dropped, so "attention," and "(attention)" both match
+    "attention".  ASCII text (the common case) takes a translate + split
+    path that gives the same tokens as the regex about three times faster.
+    """
+    text = text.lower()
+    if text.isascii():
+        return text.translate(_ASCII_NON_WORD).split()
+    return _WORD.findall(text)
+
+
+class _SparseBM25:
+    """
+    Okapi BM25 over a term -> postings index, scored with NumPy.
+
+    Produces the same scores as ``rank_bm25.BM25Okapi`` (same k1, b and
+    epsilon idf floor).  Each posting's term weight is query-independent,
+    so it is computed once here; scoring a query is then one vectorized
+    add per query term over that term's postings, instead of a Python
+    pass over every document.
+    """
+
+    def __init__(self, corpus: List[List[str]], k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        vocab: Dict[str, int] = {}
+        terms, docs, freqs = [], [], []
+        for doc_idx, document in enumerate(corpus):
+            counts = Counter(document)
+            terms.extend(vocab.setdefault(word, len(vocab)) for word in counts)
+            freqs.extend(counts.values())
+            docs.extend([doc_idx] * len(counts))
+
+        terms = np.asarray(terms, dtype=np.int64)
+        n_docs = len(corpus)
+        doc_freq = np.bincount(terms, minlength=len(vocab))
+
+        # idf exactly as BM25Okapi computes it, floored at epsilon * mean idf
+        idf = [math.log(n_docs - df + 0.5) - math.log(df + 0.5) for df in doc_freq.tolist()]
+        eps = epsilon * (sum(idf) / len(idf)) if idf else 0.0
+        idf = np.array([v if v >= 0 else eps for v in idf])
+
+        doc_len = np.array([len(document) for document in corpus])
+        avgdl = (doc_len.sum() / n_docs if n_docs else 0.0) or 1.0
+        norm = k1 * (1 - b + b * doc_len / avgdl)
+
+        # Postings grouped by term: term t owns [indptr[t], indptr[t + 1])
+        order = np.argsort(terms, kind="stable")
+        self.post_docs = np.asarray(docs, dtype=np.int64)[order]
+        tf = np.asarray(freqs, dtype=np.float64)[order]
+        self.indptr = np.concatenate(([0], np.cumsum(doc_freq)))
+        self.post_weights = idf[terms[order]] * (
+            tf * (k1 + 1) / (tf + norm[self.post_docs])
+        )
+        self.vocab = vocab
+        self.corpus_size = n_docs
+
+    def get_scores(self, query: List[str]) -> np.ndarray:
+        """Return the BM25 score of every document for the tokenized *query*."""
+        scores = np.zeros(self.corpus_size)
+        for word in query:
+            t = self.vocab.get(word)
+            if t is None:
+                continue
+            start, end = self.indptr[t], self.indptr[t + 1]
+            scores[self.post_docs[start:end]] += self.post_weights[start:end]
+        return scores
+
+
+@dataclass(frozen=True, slots=True)
+class _BM25Corpus:
+    """One immutable snapshot of the BM25 corpus and the scorer built over it."""
+
+    ids: List[str] = field(default_factory=list)
+    docs: List[str] = field(default_factory=list)
+    metadatas: List[Dict] = field(default_factory=list)
+    tokens: List[List[str]] = field(default_factory=list)
+    index: Optional[_SparseBM25] = None
+
 
 class HybridRetriever:
     """
@@ -22,20 +122,34 @@ class HybridRetriever:
         results = retriever.search("What is attention mechanism?")
     """
 
-    def __init__(self, collection, embedder):
+    QUERY_CACHE_SIZE = 1024  # Query embeddings kept by vector_search
+
+    def __init__(self, collection, embedder, bm25_cache_path: Optional[Path] = None):
         """
         Initialize the hybrid retriever.
 
         Args:
             collection: ChromaDB collection containing indexed documents.
             embedder: SentenceTransformer model used for query embedding.
+            bm25_cache_path: Optional file in which the tokenized BM25 corpus
+                is kept between runs, so unchanged documents are not
+                re-tokenized on startup.
         """
         self.collection = collection
         self.embedder = embedder
-        self.bm25_index = None
-        self.bm25_docs = []
-        self.bm25_metadatas = []
-        self.bm25_ids = []
+        self.bm25_cache_path = bm25_cache_path
+        # Replaced whole by _set_bm25_corpus, so a search that grabbed it
+        # keeps a consistent index/ids/docs set while documents change
+        self.bm25 = _BM25Corpus()
+        # Serializes the read-modify-write corpus updates
+        self._bm25_update_lock = threading.Lock()
+        # LRU of query text -> embedding; searches run in worker threads
+        self._query_embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._query_embeddings_lock = threading.Lock()
+        # Runs the vector branch of search() while BM25 scores in the caller
+        self._search_pool = ThreadPoolExecutor(
+            max_workers=4, thread_name_prefix="vector-search"
+        )
         self.cross_encoder = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
 
     def build_bm25_index(self):
@@ -43,21 +157,111 @@ class HybridRetriever:
         Fetch all documents from the ChromaDB collection and build a BM25
         index over their tokenized content.
 
-        Tokenization uses simple lowercased word splitting to keep the
-        keyword matching straightforward and fast.
+        Tokenization lowercases and keeps runs of word characters (see
+        _tokenize).  Documents whose text
+        matches the on-disk cache reuse their cached tokens.
         """
-        all_data = self.collection.get(include=["documents", "metadatas"])
+        # Held from the read onwards, so documents added or removed
+        # concurrently are not overwritten by an older snapshot
+        with self._bm25_update_lock:
+            all_data = self.collection.get(include=["documents", "metadatas"])
 
-        self.bm25_docs = all_data.get("documents", []) or []
-        self.bm25_metadatas = all_data.get("metadatas", []) or []
-        self.bm25_ids = all_data.get("ids", []) or []
+            docs = all_data.get("documents", []) or []
+            metadatas = all_data.get("metadatas", []) or []
+            ids = all_data.get("ids", []) or []
 
-        if not self.bm25_docs:
-            self.bm25_index = None
-            return
+            cached = self._load_bm25_cache()
+            tokens = []
+            for doc_id, doc in zip(ids, docs):
+                hit = cached.get(doc_id)
+                tokens.append(hit[1] if hit is not None and hit[0] == doc else _tokenize(doc))
+
+            self._set_bm25_corpus(ids, docs, metadatas, tokens)
 
-        tokenized_corpus = [doc.lower().split() for doc in self.bm25_docs]
-        self.bm25_index = BM25Okapi(tokenized_corpus)
+    def add_documents_to_bm25(self, ids: List[str], docs: List[str], metadatas: List[Dict]):
+        """
+        Add newly indexed documents to the BM25 index.
+
+        Only the new documents are tokenized; the BM25 statistics are then
+        recomputed from the tokenized corpus.  IDs already in the index
+        are skipped.
+        """
+        with self._bm25_update_lock:
+            corpus = self.bm25
+            existing = set(corpus.ids)
+            new = [i for i, doc_id in enumerate(ids) if doc_id not in existing]
+            self._set_bm25_corpus(
+                corpus.ids + [ids[i] for i in new],
+                corpus.docs + [docs[i] for i in new],
+                corpus.metadatas + [metadatas[i] for i in new],
+                corpus.tokens + [_tokenize(docs[i]) for i in new],
+            )
+
+    def remove_documents_from_bm25(self, ids: List[str]):
+        """Drop *ids* from the BM25 index without re-tokenizing the rest."""
+        drop = set(ids)
+        with self._bm25_update_lock:
+            corpus = self.bm25
+            keep = [i for i, doc_id in enumerate(corpus.ids) if doc_id not in drop]
+            self._set_bm25_corpus(
+                [corpus.ids[i] for i in keep],
+                [corpus.docs[i] for i in keep],
+                [corpus.metadatas[i] for i in keep],
+                [corpus.tokens[i] for i in keep],
+            )
+
+    def _set_bm25_corpus(
+        self,
+        ids: List[str],
+        docs: List[str],
+        metadatas: List[Dict],
+        tokens: List[List[str]],
+    ):
+        """Install a tokenized corpus, rebuild the BM25 scorer and persist the tokens.
+
+        The scorer is built first and the new snapshot published with a
+        single assignment.  Callers hold _bm25_update_lock.
+        """
+        index = _SparseBM25(tokens) if docs else None
+        self.bm25 = _BM25Corpus(ids, docs, metadatas, tokens, index)
+        self._save_bm25_cache()
+
+    def _load_bm25_cache(self) -> Dict[str, tuple]:
+        """Return ``{id: (text, tokens)}`` from the BM25 cache, or {} if unusable."""
+        if self.bm25_cache_path is None or not self.bm25_cache_path.exists():
+            return {}
+        try:
+            with open(self.bm25_cache_path, "rb") as f:
+                cache = pickle.load(f)
+            if cache.get("version") != BM25_CACHE_VERSION:
+                return {}
+            return dict(zip(cache["ids"], zip(cache["docs"], cache["tokens"])))
+        except Exception as e:
+            print(f"  Ignoring unreadable BM25 cache: {e}")
+            return {}
+
+    def _save_bm25_cache(self):
+        """Write the tokenized corpus to the BM25 cache file, if configured."""
+        if self.bm25_cache_path is None:
+            return
+        corpus = self.bm25
+        try:
+            self.bm25_cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.bm25_cache_path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                pickle.dump(
+                    {
+                        "version": BM25_CACHE_VERSION,
+                        "ids": corpus.ids,
+                        "docs": corpus.docs,
+                        "tokens": corpus.tokens,
+                    },
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(tmp_path, self.bm25_cache_path)
+        except Exception as e:
+            print(f"  Could not write BM25 cache: {e}")
 
     def bm25_search(self, query: str, n_results: int = 20) -> List[Dict]:
         """
@@ -72,32 +276,47 @@ class HybridRetriever:
             Returns empty list if the BM25 index has not been built or
             contains no documents.
         """
-        if self.bm25_index is None or not self.bm25_docs:
+        corpus = self.bm25  # one snapshot for the whole search
+        if corpus.index is None or not corpus.docs:
             return []
 
-        tokenized_query = query.lower().split()
-        scores = self.bm25_index.get_scores(tokenized_query)
+        tokenized_query = _tokenize(query)
+        scores = corpus.index.get_scores(tokenized_query)
 
-        scored_indices = sorted(
-            range(len(scores)),
-            key=lambda i: scores[i],
-            reverse=True,
-        )[:n_results]
+        scored_indices = self._top_indices(scores, n_results)
 
         results = []
-        for idx in scored_indices:
-            if scores[idx] <= 0:
-                continue
-            metadata = self.bm25_metadatas[idx] if idx < len(self.bm25_metadatas) else {}
+        for idx in scored_indices.tolist():
+            metadata = corpus.metadatas[idx] if idx < len(corpus.metadatas) else {}
             results.append({
-                "text": self.bm25_docs[idx],
+                "text": corpus.docs[idx],
                 "source": metadata.get("source", "unknown"),
                 "score": float(scores[idx]),
-                "id": self.bm25_ids[idx] if idx < len(self.bm25_ids) else "",
+                "id": corpus.ids[idx] if idx < len(corpus.ids) else "",
             })
 
         return results
 
+    @staticmethod
+    def _top_indices(scores: np.ndarray, n: int) -> np.ndarray:
+        """
+        Indices of the *n* highest positive *scores*, best first.
+
+        Ties keep document order.  Only documents that matched a query
+        term are considered, and np.partition finds the cutoff score in
+        linear time, so just the selected indices are sorted.
+        """
+        candidates = np.flatnonzero(scores > 0)
+        if n <= 0:
+            return candidates[:0]
+        if len(candidates) > n:
+            cutoff = np.partition(scores[candidates], len(candidates) - n)[len(candidates) - n]
+            above = candidates[scores[candidates] > cutoff]
+            at_cutoff = candidates[scores[candidates] == cutoff]
+            candidates = np.concatenate((above, at_cutoff[:n - len(above)]))
+        # Sort by score descending, then by index (lexsort's last key is primary)
+        return candidates[np.lexsort((candidates, -scores[candidates]))]
+
     def vector_search(self, query: str, n_results: int = 20) -> List[Dict]:
         """
         Perform dense vector similarity search via ChromaDB.
@@ -110,7 +329,7 @@ class HybridRetriever:
             List of dicts with keys: text, source, score, id.
             Score is derived from ChromaDB distance (lower distance = higher score).
         """
-        query_embedding = self.embedder.encode([query]).tolist()
+        query_embedding = self._embed_query(query)
 
         raw = self.collection.query(
             query_embeddings=query_embedding,
@@ -134,8 +353,31 @@ class HybridRetriever:
 
         return results
 
+    def _embed_query(self, query: str) -> np.ndarray:
+        """
+        Return the (1, dim) embedding of *query*, reusing recent ones.
+
+        Repeated questions (retries, evaluation runs, agent follow-ups)
+        skip the encoder forward pass.  The array is handed to Chroma
+        as is, without converting it to nested lists.
+        """
+        with self._query_embeddings_lock:
+            embedding = self._query_embeddings.get(query)
+            if embedding is not None:
+                self._query_embeddings.move_to_end(query)
+                return embedding
+
+        embedding = self.embedder.encode([query], show_progress_bar=False)
+
+        with self._query_embeddings_lock:
+            self._query_embeddings[query] = embedding
+            self._query_embeddings.move_to_end(query)
+            while len(self._query_embeddings) > self.QUERY_CACHE_SIZE:
+                self._query_embeddings.popitem(last=False)
+        return embedding
+
     def reciprocal_rank_fusion(
-        self, results_list: List[List[Dict]], k: int = 60
+        self, results_list: List[List[Dict]], k: int = 60, top_n: Optional[int] = None
     ) -> List[Dict]:
         """
         Merge multiple ranked result lists using Reciprocal Rank Fusion.
@@ -148,10 +390,12 @@ class HybridRetriever:
         Args:
             results_list: List of ranked result lists to fuse.
             k: Smoothing constant (default 60, per the original RRF paper).
+            top_n: Keep only the top_n fused results (default: all).
 
         Returns:
             Merged list of dicts sorted by fused score descending.
-            Each dict contains: text, source, score, id.
+            Each dict contains: text, source, score, id. The input result
+            dicts are reused, so their "score" is overwritten.
         """
         fused_scores: Dict[str, float] = {}
         doc_map: Dict[str, Dict] = {}
@@ -163,11 +407,14 @@ class HybridRetriever:
                 if doc_id not in doc_map:
                     doc_map[doc_id] = result
 
-        sorted_ids = sorted(fused_scores, key=lambda d: fused_scores[d], reverse=True)
+        if top_n is None:
+            sorted_ids = sorted(fused_scores, key=fused_scores.__getitem__, reverse=True)
+        else:
+            sorted_ids = heapq.nlargest(top_n, fused_scores, key=fused_scores.__getitem__)
 
         merged = []
         for doc_id in sorted_ids:
-            entry = doc_map[doc_id].copy()
+            entry = doc_map[doc_id]
             entry["score"] = fused_scores[doc_id]
             merged.append(entry)
 
@@ -195,7 +442,9 @@ class HybridRetriever:
             return []
 
         pairs = [[query, c["text"]] for c in candidates]
-        ce_scores = self.cross_encoder.predict(pairs)
+        # One forward batch for all candidates (the default is 32 pairs),
+        # which matters most when the cross-encoder runs on a GPU
+        ce_scores = self.cross_encoder.predict(pairs, batch_size=128, convert_to_numpy=True)
 
         for i, candidate in enumerate(candidates):
             candidate["score"] = float(ce_scores[i])
@@ -208,8 +457,9 @@ class HybridRetriever:
         Execute the full hybrid retrieval pipeline:
 
         1. Run BM25 keyword search and vector similarity search in parallel.
-        2. Fuse both result lists with Reciprocal Rank Fusion.
-        3. Rerank the fused candidates with a cross-encoder.
+        2. Fuse both result lists with Reciprocal Rank Fusion, keeping the
+           top 4 * n_results candidates.
+        3. Rerank those candidates with a cross-encoder.
         4. Return the top-k results in the standard output format.
 
         Falls back to vector-only retrieval if the BM25 index is empty
@@ -225,12 +475,18 @@ class HybridRetriever:
             so that lower values indicate higher relevance (compatible
             with the existing frontend).
         """
+        # The branches are independent: embed + HNSW lookup in a pool thread,
+        # BM25 scoring (mostly NumPy) here
+        vector_future = self._search_pool.submit(self.vector_search, query, 20)
         bm25_results = self.bm25_search(query, n_results=20)
-        vector_results = self.vector_search(query, n_results=20)
+        vector_results = vector_future.result()
 
         # Fuse or fall back to vector-only when BM25 has no results
         if bm25_results:
-            fused = self.reciprocal_rank_fusion([bm25_results, vector_results])
+            # Only the best-fused candidates are worth a cross-encoder pass
+            fused = self.reciprocal_rank_fusion(
+                [bm25_results, vector_results], top_n=n_results * 4
+            )
             retrieval_method = "hybrid"
         else:
             fused = vector_results
@@ -110,7 +110,7 @@ export default function PaperLibrary({
           <div className="px-2 py-1 space-y-0.5">
             {papers.map((paper) => (
               <div
-                key={paper.sha256}
+                key={paper.hash}
                 className="group relative bg-white/60 hover:bg-white rounded-lg px-3 py-2 transition-colors"
               >
                 <p className="text-xs text-[#1a1a1a] font-medium truncate pr-5">
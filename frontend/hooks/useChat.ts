@@ -2,7 +2,7 @@
 
 import { useState, useEffect, useCallback } from "react";
 import { Message, Chat, Source, Paper } from "@/lib/types";
-import { queryRAG, queryAgent, checkHealth, indexPapers, checkIndexStatus, getPapers, uploadPaper, deletePaper } from "@/lib/api";
+import { queryRAG, queryAgent, checkHealth, indexPapers, subscribeIndexStatus, getPapers, uploadPaper, checkUploadStatus, deletePaper } from "@/lib/api";
 import { IndexStatus } from "@/lib/types";
 
 const STORAGE_KEY = "glm-rag-chats";
@@ -78,29 +78,24 @@ export function useChat() {
     try {
       await indexPapers(); // kicks off background indexing
 
-      // Poll for progress
-      const poll = setInterval(async () => {
-        try {
-          const status = await checkIndexStatus();
-          setIndexProgress(status);
-
-          if (status.state === "done") {
-            clearInterval(poll);
-            setIsIndexed(true);
-            setCollectionCount(status.total_chunks);
-            setIndexingResult(
-              `Indexed ${status.papers_done} papers (${status.total_chunks} chunks)`
-            );
-            setIsIndexing(false);
-          } else if (status.state === "error") {
-            clearInterval(poll);
-            setIndexingResult(`Indexing failed: ${status.error || "Unknown error"}`);
-            setIsIndexing(false);
-          }
-        } catch {
-          // polling failure — keep trying
+      // Follow progress pushed by the server
+      const unsubscribe = subscribeIndexStatus((status) => {
+        setIndexProgress(status);
+
+        if (status.state === "done") {
+          unsubscribe();
+          setIsIndexed(true);
+          setCollectionCount(status.total_chunks);
+          setIndexingResult(
+            `Indexed ${status.papers_done} papers (${status.total_chunks} chunks)`
+          );
+          setIsIndexing(false);
+        } else if (status.state === "error") {
+          unsubscribe();
+          setIndexingResult(`Indexing failed: ${status.error || "Unknown error"}`);
+          setIsIndexing(false);
         }
-      }, 2000);
+      });
     } catch (error) {
       setIndexingResult(
         `Indexing failed: ${error instanceof Error ? error.message : "Unknown error"}`
@@ -266,13 +261,22 @@ export function useChat() {
     setIsUploading(true);
     setUploadResult(null);
     try {
-      const result = await uploadPaper(file);
+      let result = await uploadPaper(file); // indexing continues in the background
+
+      // Poll until the server has indexed the paper
+      while (result.status === "queued" || result.status === "indexing") {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        result = await checkUploadStatus(result.filename);
+      }
+      if (result.status === "error") {
+        throw new Error(result.error || "Indexing failed");
+      }
       setUploadResult(`Indexed "${result.title}" (${result.chunk_count} chunks)`);
       // Refresh papers list
       const papersData = await getPapers();
       setPapers(papersData.papers);
       setIsIndexed(true);
-      setCollectionCount(prev => prev + result.chunk_count);
+      setCollectionCount(prev => prev + (result.chunk_count ?? 0));
     } catch (error) {
       setUploadResult(`Upload failed: ${error instanceof Error ? error.message : "Unknown error"}`);
     } finally {
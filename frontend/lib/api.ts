@@ -72,6 +72,42 @@ export async function checkIndexStatus(): Promise<IndexStatus> {
   return res.json();
 }
 
+// Follow indexing progress over server-sent events; returns an unsubscribe function.
+// If the stream fails (error response, dropped by a proxy), falls back to
+// polling /index/status until indexing finishes.
+export function subscribeIndexStatus(
+  onStatus: (status: IndexStatus) => void
+): () => void {
+  let poll: ReturnType<typeof setInterval> | null = null;
+  const source = new EventSource(`${API_BASE}/index/stream`);
+  source.onmessage = (event) => {
+    const status: IndexStatus = JSON.parse(event.data);
+    onStatus(status);
+    if (status.state !== "indexing") source.close();
+  };
+  source.onerror = () => {
+    source.close();
+    if (poll) return;
+    poll = setInterval(async () => {
+      try {
+        const status = await checkIndexStatus();
+        onStatus(status);
+        if (status.state !== "indexing" && poll) {
+          clearInterval(poll);
+          poll = null;
+        }
+      } catch {
+        // polling failure — keep trying
+      }
+    }, 2000);
+  };
+  return () => {
+    source.close();
+    if (poll) clearInterval(poll);
+    poll = null;
+  };
+}
+
 export async function getStats(): Promise<StatsResponse> {
   const res = await fetch(`${API_BASE}/stats`);
   return res.json();
@@ -97,6 +133,12 @@ export async function uploadPaper(file: File): Promise<UploadResponse> {
   return res.json();
 }
 
+export async function checkUploadStatus(filename: string): Promise<UploadResponse> {
+  const res = await fetch(`${API_BASE}/upload/status/${encodeURIComponent(filename)}`);
+  if (!res.ok) throw new Error(`Upload status error: ${res.status}`);
+  return res.json();
+}
+
 export async function deletePaper(paperId: string): Promise<void> {
   const res = await fetch(`${API_BASE}/papers/${encodeURIComponent(paperId)}`, {
     method: "DELETE",
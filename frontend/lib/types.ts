@@ -74,7 +74,8 @@ export interface Paper {
   page_count: number;
   chunk_count: number;
   indexed_at: string;
-  sha256: string;
+  hash: string;
+  algo: string;
 }
 
 export interface PapersListResponse {
@@ -83,9 +84,10 @@ export interface PapersListResponse {
 }
 
 export interface UploadResponse {
-  status: string;
+  status: "queued" | "indexing" | "success" | "error";
   filename: string;
-  title: string;
-  page_count: number;
-  chunk_count: number;
+  title: string | null;
+  page_count: number | null;
+  chunk_count: number | null;
+  error: string | null;
 }
@@ -29,7 +29,8 @@ echo "[OK] Ollama is installed."
 # -------------------------------------------
 if ! curl -sf "${OLLAMA_URL}/api/tags" > /dev/null 2>&1; then
   echo "[INFO] Ollama is not running. Starting it..."
-  ollama serve &
+  # Let Ollama serve concurrent judge/agent requests instead of queueing them
+  OLLAMA_NUM_PARALLEL="${OLLAMA_NUM_PARALLEL:-4}" ollama serve &
   OLLAMA_PID=$!
 
   # Wait with exponential backoff (up to ~15s)